@@ -0,0 +1,257 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+LANES = ("interactive", "batch")
+
+
+class Rejected(Exception):
+    """A request was shed; status is 429 or 503 and retry_after is in seconds"""
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _AsyncWaiter:
+    """Queue entry of a coroutine waiting in acquire_async()"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+class _ModelQueue:
+    def __init__(self):
+        self.running = 0
+        self.waiting = {lane: deque() for lane in LANES}
+        self.service_time = None  # EWMA of seconds a slot is held
+
+
+class AdmissionController:
+    """Bounded, prioritized admission of inference work per model
+
+    At most limit_for(model_id) requests run per model; the rest wait in
+    per-priority lanes, interactive ahead of batch. A request is shed with
+    429 when its lane is full, and with 503 when its projected wait (queue
+    position times the model's average service time) exceeds the lane's
+    deadline or it is still waiting when the deadline passes.
+    """
+
+    def __init__(self, limit_for=None, max_queue=None, deadlines=None, initial_estimate=None):
+        default_limit = int(os.environ.get('ADMISSION_MODEL_CONCURRENCY', '2'))
+        self.limit_for = limit_for or (lambda model_id: None)
+        self.default_limit = max(1, default_limit)
+        if max_queue is None:
+            max_queue = int(os.environ.get('ADMISSION_MAX_QUEUE', '32'))
+        self.max_queue = max_queue  # per model and lane
+        self.deadlines = deadlines or {
+            "interactive": float(os.environ.get('ADMISSION_INTERACTIVE_DEADLINE_MS', '5000')) / 1000.0,
+            "batch": float(os.environ.get('ADMISSION_BATCH_DEADLINE_MS', '30000')) / 1000.0,
+        }
+        if initial_estimate is None:
+            initial_estimate = float(os.environ.get('ADMISSION_INITIAL_ESTIMATE_MS', '1000')) / 1000.0
+        self.initial_estimate = initial_estimate
+        self.admitted = defaultdict(int)  # lane -> count
+        self.shed = defaultdict(int)  # (lane, reason) -> count
+        self._models = defaultdict(_ModelQueue)
+        self._changed = threading.Condition()
+        self._async_waiters = set()
+
+    def _limit(self, model_id):
+        return max(1, self.limit_for(model_id) or self.default_limit)
+
+    def capacity(self, model_ids):
+        """Requests that can run at once across model_ids"""
+        return sum(self._limit(model_id) for model_id in model_ids)
+
+    def _projected_wait(self, state, limit, lane):
+        """Seconds until a request joining lane now would start"""
+        ahead = state.running - limit + 1
+        for other in LANES[:LANES.index(lane) + 1]:
+            ahead += len(state.waiting[other])
+        if ahead <= 0:
+            return 0.0
+        estimate = state.service_time if state.service_time is not None else self.initial_estimate
+        return math.ceil(ahead / limit) * estimate
+
+    def acquire(self, model_id, lane="interactive"):
+        """Wait for a slot; returns a ticket for release() or raises Rejected"""
+        if lane not in LANES:
+            lane = LANES[-1]
+        limit = self._limit(model_id)
+        waiter = object()
+        with self._changed:
+            state = self._models[model_id]
+            ticket = self._enter(state, model_id, lane, limit, waiter)
+            if ticket is not None:
+                return ticket
+            expires = time.monotonic() + self.deadlines[lane]
+            while not self._is_next(state, lane, waiter, limit):
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    self._time_out(state, model_id, lane, limit, waiter)
+                self._changed.wait(remaining)
+            return self._leave_queue(state, model_id, lane, limit)
+
+    async def acquire_async(self, model_id, lane="interactive"):
+        """acquire() for coroutines: waits on the event loop instead of blocking a thread"""
+        if lane not in LANES:
+            lane = LANES[-1]
+        limit = self._limit(model_id)
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        with self._changed:
+            state = self._models[model_id]
+            ticket = self._enter(state, model_id, lane, limit, waiter)
+            if ticket is not None:
+                return ticket
+            self._async_waiters.add(waiter)
+        expires = time.monotonic() + self.deadlines[lane]
+        try:
+            while True:
+                with self._changed:
+                    if self._is_next(state, lane, waiter, limit):
+                        self._async_waiters.discard(waiter)
+                        return self._leave_queue(state, model_id, lane, limit)
+                    remaining = expires - time.monotonic()
+                    if remaining <= 0:
+                        self._async_waiters.discard(waiter)
+                        self._time_out(state, model_id, lane, limit, waiter)
+                    # Wakeups scheduled from here on run after this clear
+                    waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            # The client went away while queued
+            with self._changed:
+                self._async_waiters.discard(waiter)
+                if waiter in state.waiting[lane]:
+                    state.waiting[lane].remove(waiter)
+                    self._notify()
+            raise
+
+    def _enter(self, state, model_id, lane, limit, waiter):
+        """Take a free slot (returns the ticket), queue waiter (returns None) or raise Rejected
+
+        Caller holds the lock.
+        """
+        if state.running < limit and not any(state.waiting[other] for other in LANES):
+            return self._start(state, model_id, lane)
+
+        projected = self._projected_wait(state, limit, lane)
+        deadline = self.deadlines[lane]
+        if len(state.waiting[lane]) >= self.max_queue:
+            self.shed[(lane, "queue_full")] += 1
+            raise Rejected(429, f"Too many queued {lane} requests for {model_id}", max(1, math.ceil(projected)))
+        if projected > deadline:
+            self.shed[(lane, "deadline")] += 1
+            raise Rejected(503, f"Projected wait for {model_id} exceeds {deadline:.0f}s", math.ceil(projected))
+        state.waiting[lane].append(waiter)
+        return None
+
+    def _time_out(self, state, model_id, lane, limit, waiter):
+        """Drop a waiter whose deadline passed; caller holds the lock"""
+        state.waiting[lane].remove(waiter)
+        self.shed[(lane, "timeout")] += 1
+        self._notify()
+        raise Rejected(503, f"Timed out waiting for {model_id}",
+                       math.ceil(self._projected_wait(state, limit, lane)) or 1)
+
+    def _leave_queue(self, state, model_id, lane, limit):
+        """Start the waiter at the head of lane; caller holds the lock"""
+        state.waiting[lane].popleft()
+        ticket = self._start(state, model_id, lane)
+        if state.running < limit:
+            # A slot is still free: let the next waiter check whether it is up
+            self._notify()
+        return ticket
+
+    def _notify(self):
+        """Wake every waiter, threads and coroutines; caller holds the lock"""
+        self._changed.notify_all()
+        for waiter in self._async_waiters:
+            waiter.wake()
+
+    @staticmethod
+    def _is_next(state, lane, ticket, limit):
+        if state.running >= limit:
+            return False
+        for other in LANES:
+            if state.waiting[other]:
+                return other == lane and state.waiting[other][0] is ticket
+        return False
+
+    def _start(self, state, model_id, lane):
+        """Take a slot; caller holds the lock"""
+        state.running += 1
+        self.admitted[lane] += 1
+        return (model_id, time.monotonic())
+
+    def release(self, ticket):
+        model_id, started = ticket
+        elapsed = time.monotonic() - started
+        with self._changed:
+            state = self._models[model_id]
+            state.running -= 1
+            if state.service_time is None:
+                state.service_time = elapsed
+            else:
+                state.service_time = 0.8 * state.service_time + 0.2 * elapsed
+            self._notify()
+
+    def get_stats(self):
+        with self._changed:
+            return {
+                "admitted": dict(self.admitted),
+                "shed": {f"{lane}:{reason}": count for (lane, reason), count in self.shed.items()},
+                "max_queue": self.max_queue,
+                "deadlines_s": dict(self.deadlines),
+                "models": {
+                    model_id: {
+                        "limit": self._limit(model_id),
+                        "running": state.running,
+                        "waiting": {lane: len(queue) for lane, queue in state.waiting.items()},
+                        "service_time_s": state.service_time,
+                    }
+                    for model_id, state in self._models.items()
+                },
+            }
+
+    def metric_lines(self):
+        """Queue depth and shed counters in Prometheus text format"""
+        stats = self.get_stats()
+        lines = [
+            "# HELP kasa_admission_queue_depth Requests waiting for an inference slot",
+            "# TYPE kasa_admission_queue_depth gauge",
+        ]
+        for model_id, model in sorted(stats["models"].items()):
+            for lane, depth in model["waiting"].items():
+                lines.append(f'kasa_admission_queue_depth{{model_id="{model_id}",lane="{lane}"}} {depth}')
+        lines += [
+            "# HELP kasa_admission_running Requests holding an inference slot",
+            "# TYPE kasa_admission_running gauge",
+        ]
+        for model_id, model in sorted(stats["models"].items()):
+            lines.append(f'kasa_admission_running{{model_id="{model_id}"}} {model["running"]}')
+        lines += [
+            "# HELP kasa_admission_shed_total Requests rejected by admission control",
+            "# TYPE kasa_admission_shed_total counter",
+        ]
+        # The snapshot taken under the lock; self.shed can grow meanwhile
+        for key, count in sorted(stats["shed"].items()):
+            lane, reason = key.split(":", 1)
+            lines.append(f'kasa_admission_shed_total{{lane="{lane}",reason="{reason}"}} {count}')
+        return lines
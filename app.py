@@ -1,15 +1,19 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-import tempfile
+import io
+import csv
+import time
 import uuid
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; DEBUG also logs per-request details
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
@@ -36,11 +40,85 @@ db.init_app(app)
 from tts_service import TTSService
 from asr_service import ASRService
 from evaluation import WERCalculator
+from synthesis_cache import SynthesisCache
+from audio_store import AudioStore
+from jobs import JobQueue, QueueFull
+from db_writer import BufferedWriter
+from audio_utils import wav_header, wav_bytes, to_asr_input, read_wav, concatenate
+from text_frontend import prepare_sentences
+from singleflight import SingleFlight
+from model_pool import rss_bytes
+from admission import AdmissionController, Rejected
+import metrics
 
-# Initialize services
-tts_service = TTSService()
-asr_service = ASRService()
+# Initialize services; with INFERENCE_SOCKET set, inference runs in the
+# shared worker pool (inference_pool.py) instead of in every web worker
+if os.environ.get('INFERENCE_SOCKET'):
+    from inference_pool import InferenceClient, RemoteTTSService, RemoteASRService
+    inference_client = InferenceClient(os.environ['INFERENCE_SOCKET'])
+    tts_service = RemoteTTSService(inference_client)
+    asr_service = RemoteASRService(inference_client)
+else:
+    tts_service = TTSService()
+    asr_service = ASRService()
 wer_calculator = WERCalculator()
+audio_store = AudioStore()
+synthesis_cache = SynthesisCache(cache_dir=audio_store.directory)
+audio_store.on_delete = synthesis_cache.forget
+preencode_formats = [fmt.strip() for fmt in os.environ.get('AUDIO_PREENCODE_FORMATS', '').split(',') if fmt.strip()]
+job_queue = JobQueue()
+evaluation_enabled = os.environ.get('EVALUATION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+sentence_gap_ms = float(os.environ.get('TTS_SENTENCE_GAP_MS', '120'))
+# Identical concurrent synthesis requests run once, within and across workers
+synthesis_flight = SingleFlight(lock_dir=audio_store.directory)
+
+def admission_limit(model_id):
+    """Requests admitted at once for a model: its manifest concurrency, else
+    enough to fill a micro-batch (never below ADMISSION_MODEL_CONCURRENCY)"""
+    concurrency = tts_service.available_models.get(model_id, {}).get("concurrency")
+    if concurrency:
+        return concurrency
+    return max(admission.default_limit, tts_service.batch_size_for(model_id))
+
+# Inference is admitted per model in priority lanes; overload is shed with 429/503
+admission = AdmissionController(limit_for=admission_limit)
+# Sentences of one request are synthesized concurrently so they share
+# micro-batches; by default there is a thread for every admitted request
+sentence_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('TTS_SENTENCE_WORKERS') or max(4, admission.capacity(tts_service.available_models))),
+    thread_name_prefix="sentence"
+)
+
+# Warm the configured models without blocking worker boot
+tts_service.preload()
+
+# Per-request stage timings are returned as Server-Timing headers when the
+# request sends X-Trace: 1, or for every request with METRICS_TRACE=all
+trace_all = os.environ.get('METRICS_TRACE', '').lower() == 'all'
+
+@app.before_request
+def start_request_timing():
+    request.started_at = time.perf_counter()
+    if trace_all or request.headers.get('X-Trace') == '1':
+        metrics.start_trace()
+
+@app.after_request
+def finish_request_timing(response):
+    started = getattr(request, 'started_at', None)
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unknown",
+            method=request.method,
+            status=response.status_code,
+        )
+    trace = metrics.end_trace()
+    if trace is not None:
+        trace_id, stages = trace
+        response.headers['X-Trace-Id'] = trace_id
+        if stages:
+            response.headers['Server-Timing'] = metrics.server_timing(stages)
+    return response
 
 @app.route('/')
 def index():
@@ -52,6 +130,49 @@ def index():
         logger.error(f"Error loading models: {str(e)}")
         return render_template('index.html', models=[], error="Failed to load TTS models")
 
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: every preloaded model loaded and the database answers"""
+    checks = {"models_preloaded": tts_service.preload_complete.is_set()}
+    # A model that failed to preload would be loaded (or fail) on a user request
+    preload_errors = {}
+    for model_id, error in tts_service.preload_status().items():
+        checks[f"model:{model_id}"] = error is None
+        if error:
+            preload_errors[model_id] = error
+    if hasattr(tts_service, "ping"):
+        # Inference runs in the pool; it has to be up now, not just at boot
+        checks["inference_pool"] = tts_service.ping()
+    try:
+        db.session.execute(sql_text("SELECT 1"))
+        checks["database"] = True
+    except Exception as e:
+        logger.error(f"Readiness database check failed: {str(e)}")
+        checks["database"] = False
+
+    ready = all(checks.values())
+    body = {"status": "ready" if ready else "failed" if preload_errors else "starting", "checks": checks}
+    if preload_errors:
+        body["preload_errors"] = preload_errors
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage and request latency histograms in Prometheus text format"""
+    process_lines = [
+        "# HELP process_resident_memory_bytes Resident memory size in bytes",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {rss_bytes()}",
+    ]
+    return Response(
+        metrics.render_metrics(admission.metric_lines() + process_lines), mimetype='text/plain; version=0.0.4'
+    )
+
 @app.route('/api/models', methods=['GET'])
 def get_models():
     """Get available TTS models"""
@@ -62,6 +183,15 @@ def get_models():
         logger.error(f"Error fetching models: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/models/status', methods=['GET'])
+def get_models_status():
+    """Get load time and residency of TTS models"""
+    try:
+        return jsonify({"status": "success", **tts_service.get_model_status()})
+    except Exception as e:
+        logger.error(f"Error fetching model status: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/speakers/<model_id>', methods=['GET'])
 def get_speakers(model_id):
     """Get available speakers for a model"""
@@ -72,9 +202,183 @@ def get_speakers(model_id):
         logger.error(f"Error fetching speakers for {model_id}: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def record_synthesis(log_entry):
+    """Queue a SynthesisLog row; written in bulk off the request thread"""
+    log_writer.add(models.SynthesisLog, log_entry)
+
+def update_synthesis(log_key, **values):
+    """Queue an update of the SynthesisLog row recorded with log_key"""
+    log_writer.update(models.SynthesisLog, "log_key", log_key, values)
+
+def store_audio(audio_id, audio_data, sample_rate, model_id=None, speaker=None):
+    """Write a waveform into the synthesis cache and return its path"""
+    partial_path = synthesis_cache.partial_path_for(audio_id)
+    try:
+        with metrics.stage("file_write", model_id, speaker):
+            with open(partial_path, 'wb') as f:
+                f.write(wav_bytes(audio_data, sample_rate))
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return synthesis_cache.put(audio_id, partial_path)
+
+def preencode(audio_id):
+    """Encode compressed variants ahead of the first download"""
+    for fmt in preencode_formats:
+        try:
+            job_queue.submit("encode", audio_store.encode, audio_id, fmt, key=f"{audio_id}.{fmt}")
+        except QueueFull:
+            # Encoded on first download instead
+            break
+
+def synthesize_sentences(sentences, model_id, speaker=None):
+    """Synthesize normalized sentences and join them into one waveform
+    
+    With several sentences, each one's audio is cached on its own, so texts
+    that share sentences reuse earlier work. Returns (int16 waveform,
+    sample_rate), or None if any sentence failed.
+    """
+    if len(sentences) == 1:
+        # The caller already looked this sentence up under the request's key
+        return tts_service.synthesize_audio(sentences[0], model_id, speaker)
+    
+    use_cache = tts_service.cache_enabled(model_id)
+    
+    def synthesize_one(sentence):
+        if not use_cache:
+            return tts_service.synthesize_audio(sentence, model_id, speaker)
+        key = synthesis_cache.make_key(sentence, model_id, speaker)
+        path = synthesis_cache.get(key)
+        if path is not None:
+            try:
+                return read_wav(path)
+            except Exception as e:
+                logger.error(f"Failed to read cached sentence {key}: {str(e)}")
+        result = tts_service.synthesize_audio(sentence, model_id, speaker)
+        if result is not None:
+            store_audio(key, *result, model_id=model_id, speaker=speaker)
+        return result
+    
+    # Stages timed on the executor threads still reach this request's trace
+    results = list(sentence_executor.map(metrics.propagate(synthesize_one), sentences))
+    if any(result is None for result in results):
+        return None
+    sample_rate = results[0][1]
+    if any(rate != sample_rate for _, rate in results):
+        logger.error(f"Sentences of one request came back at different sample rates for {model_id}")
+        return None
+    return concatenate([audio for audio, _ in results], sample_rate, sentence_gap_ms), sample_rate
+
+def lane_for(headers):
+    """Admission lane for request headers: API clients and X-Priority: batch go to the batch lane"""
+    if headers.get('X-API-Key') or headers.get('Authorization'):
+        return "batch"
+    if headers.get('X-Priority', '').lower() == "batch":
+        return "batch"
+    return "interactive"
+
+def request_lane():
+    """Admission lane for this request"""
+    return lane_for(request.headers)
+
+# Set by asgi.py to the model whose admission slot it already holds for the request
+ADMITTED_ENVIRON_KEY = "kasa.admitted_model"
+
+def acquire_slot(model_id):
+    """Take an admission slot for this request; None if the async server already took it"""
+    if request.environ.get(ADMITTED_ENVIRON_KEY) == model_id:
+        return None
+    return admission.acquire(model_id, request_lane())
+
+def release_slot(ticket):
+    if ticket is not None:
+        admission.release(ticket)
+
+def admitted(model_id, fn):
+    """Run fn once admission control grants a slot for model_id"""
+    ticket = acquire_slot(model_id)
+    try:
+        return fn()
+    finally:
+        release_slot(ticket)
+
+def rejection_response(error):
+    logger.warning(f"Shed request ({error.status}): {str(error)}")
+    response = jsonify({"status": "error", "message": str(error), "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
+def evaluate_synthesis(audio, text, model_id, speaker=None, log_key=None, sample_rate=None):
+    """Transcribe synthesized audio, score it and log poor quality samples
+    
+    audio is a WAV path, or a waveform at sample_rate that is handed to ASR
+    in memory. When given, log_key names the SynthesisLog row (recorded when
+    the request was handled) that receives the scores.
+    """
+    if sample_rate is not None:
+        with metrics.stage("resample", model_id, speaker):
+            audio = to_asr_input(audio, sample_rate)
+    result = _evaluate_synthesis(audio, text, model_id, speaker)
+    if log_key is not None:
+        update_synthesis(log_key, transcription=result["transcription"], wer_score=result["wer_score"])
+    return result
+
+def submit_evaluation(audio_id, audio_path, audio_data, sample_rate, text, model_id, speaker, log_key):
+    """Queue the evaluation job for a synthesis; None when the job queue is full
+    
+    A fresh waveform goes to ASR in memory; otherwise the stored WAV is read.
+    A deduplicated job (same audio_id) scores only its own log row.
+    """
+    if audio_data is not None:
+        evaluation_args = (audio_data, text, model_id, speaker)
+        evaluation_kwargs = {"sample_rate": sample_rate}
+    else:
+        evaluation_args = (audio_path, text, model_id, speaker)
+        evaluation_kwargs = {}
+    try:
+        return job_queue.submit(
+            "evaluation", evaluate_synthesis, *evaluation_args,
+            log_key=log_key, key=audio_id, **evaluation_kwargs
+        )
+    except QueueFull:
+        # Shed evaluation rather than hold more waveforms in memory
+        logger.warning(f"Evaluation queue full; skipping evaluation of {audio_id}")
+        return None
+
+def _evaluate_synthesis(audio, text, model_id, speaker=None):
+    # Transcribe the generated audio
+    with metrics.stage("asr_transcribe", model_id, speaker):
+        transcription = asr_service.transcribe(audio)
+    
+    if transcription is None:
+        raise RuntimeError("Failed to transcribe audio")
+    
+    # Calculate WER
+    with metrics.stage("wer", model_id, speaker):
+        wer_score = wer_calculator.calculate_wer(text, transcription)
+    
+    # Log poor quality samples
+    wer_threshold = float(os.environ.get('WER_THRESHOLD', '0.3'))
+    threshold_exceeded = wer_score > wer_threshold
+    wer_calculator.record_score(wer_score, model_id, speaker, threshold_exceeded)
+    if threshold_exceeded:
+        wer_calculator.log_poor_quality(text, transcription, wer_score, model_id, speaker)
+    
+    return {
+        "transcription": transcription,
+        "wer_score": wer_score,
+        "threshold_exceeded": threshold_exceeded
+    }
+
 @app.route('/api/synthesize', methods=['POST'])
 def synthesize():
-    """Synthesize speech from text"""
+    """Synthesize speech from text
+    
+    By default the audio is stored and fetched separately via /api/audio/<id>.
+    With "response": "audio" in the body (or Accept: audio/wav) the WAV bytes
+    are returned directly from memory instead of being read back from disk.
+    """
     try:
         data = request.get_json()
         
@@ -88,71 +392,388 @@ def synthesize():
         if not text:
             return jsonify({"status": "error", "message": "Text cannot be empty"}), 400
         
-        logger.info(f"Synthesizing text: '{text}' with model: {model_id}, speaker: {speaker}")
+        if model_id not in tts_service.available_models:
+            return jsonify({"status": "error", "message": f"Unknown model: {model_id}"}), 400
+        if not tts_service.has_speaker(model_id, speaker):
+            return jsonify({"status": "error", "message": f"Unknown speaker for {model_id}: {speaker}"}), 400
         
-        # Generate unique filename
-        audio_id = str(uuid.uuid4())
-        audio_filename = f"{audio_id}.wav"
-        audio_path = os.path.join(tempfile.gettempdir(), audio_filename)
+        sentences = prepare_sentences(text, tts_service.get_language(model_id))
+        if not sentences:
+            return jsonify({"status": "error", "message": "Text has nothing to synthesize"}), 400
+        normalized_text = " ".join(sentences)
         
-        # Synthesize speech
-        success = tts_service.synthesize(text, model_id, audio_path, speaker)
+        logger.debug(f"Synthesizing {len(text)} characters ({len(sentences)} sentences) with model: {model_id}, speaker: {speaker}")
+        started = time.perf_counter()
         
-        if not success:
-            return jsonify({"status": "error", "message": "Failed to synthesize speech"}), 500
-
-        if False:
-            # Transcribe the generated audio
-            transcription = asr_service.transcribe(audio_path)
+        # Requests that normalize to the same text/model/speaker reuse the cached audio
+        audio_id = synthesis_cache.make_key(normalized_text, model_id, speaker)
+        audio_path = synthesis_cache.get(audio_id) if tts_service.cache_enabled(model_id) else None
+        
+        # In-memory mode: answer with the WAV itself
+        wants_audio = data.get('response') == 'audio' or request.accept_mimetypes.best == 'audio/wav'
+        audio_data = sample_rate = None
+        
+        if audio_path is not None:
+            logger.info(f"Synthesis cache hit: {audio_id}")
+        else:
+            def produce():
+                # Synthesize speech; the waveform stays in memory for evaluation
+                result = admitted(model_id, lambda: synthesize_sentences(sentences, model_id, speaker))
+                if result is None:
+                    return None
+                audio_data, sample_rate = result
+                # Written before the lock is released, so other workers waiting
+                # on the same audio pick it up instead of synthesizing it again
+                audio_path = store_audio(audio_id, audio_data, sample_rate, model_id, speaker)
+                preencode(audio_id)
+                return audio_data, sample_rate, audio_path
             
-            if transcription is None:
-                return jsonify({"status": "error", "message": "Failed to transcribe audio"}), 500
+            def produced_elsewhere():
+                # Another worker may have finished this audio while we waited for the lock
+                path = synthesis_cache.get(audio_id, record=False) if tts_service.cache_enabled(model_id) else None
+                return (None, None, path) if path is not None else None
             
-            # Calculate WER
-            wer_score = wer_calculator.calculate_wer(text, transcription)
+            # Identical concurrent requests, in this worker or another, share
+            # one synthesis and one audio_id
+            result, shared = synthesis_flight.do(audio_id, produce, check=produced_elsewhere)
+            if result is None:
+                return jsonify({"status": "error", "message": "Failed to synthesize speech"}), 500
+            audio_data, sample_rate, audio_path = result
+            if shared:
+                # The leader's evaluation job covers this audio
+                audio_data = sample_rate = None
+
+        if wants_audio:
+            log_entry = {
+                "text": text,
+                "model_id": model_id,
+                "speaker": speaker,
+                "audio_filename": f"{audio_id}.wav",
+                "latency_ms": (time.perf_counter() - started) * 1000.0,
+                "timestamp": datetime.utcnow(),
+            }
+            if audio_data is None:
+                # Cached or produced by another request: hand back the stored file
+                record_synthesis(log_entry)
+                audio_response = send_file(audio_path, mimetype='audio/wav')
+                audio_response.headers["X-Audio-Id"] = audio_id
+                return audio_response
             
-            # Log poor quality samples
-            wer_threshold = float(os.environ.get('WER_THRESHOLD', '0.3'))
-            if wer_score > wer_threshold:
-                wer_calculator.log_poor_quality(text, transcription, wer_score, model_id, speaker)
+            # This request synthesized it: answer from memory and evaluate after responding
+            log_entry["log_key"] = str(uuid.uuid4())
+            record_synthesis(log_entry)
+            if evaluation_enabled:
+                submit_evaluation(audio_id, audio_path, audio_data, sample_rate, normalized_text,
+                                  model_id, speaker, log_entry["log_key"])
+            return Response(wav_bytes(audio_data, sample_rate), mimetype='audio/wav', headers={"X-Audio-Id": audio_id})
         
-        return jsonify({
+        response = {
             "status": "success",
             "audio_id": audio_id,
-            "transcription": "Not Implemented",
-            "wer_score": 0,
-            "threshold_exceeded": True
-        })
+            "job_id": None,
+            "transcription": None,
+            "wer_score": None,
+            "threshold_exceeded": None
+        }
+        log_entry = {
+            "text": text,
+            "model_id": model_id,
+            "speaker": speaker,
+            "audio_filename": f"{audio_id}.wav",
+            "latency_ms": (time.perf_counter() - started) * 1000.0,
+            "timestamp": datetime.utcnow(),
+            "log_key": str(uuid.uuid4()),
+        }
+        
+        # ASR round-trip and WER scoring run off the request path; the log
+        # row is written now and the job fills in its scores
+        if evaluation_enabled:
+            job = submit_evaluation(audio_id, audio_path, audio_data, sample_rate, normalized_text,
+                                    model_id, speaker, log_entry["log_key"])
+            if job is not None:
+                response["job_id"] = job["id"]
+                if job["status"] == "completed":
+                    response.update(job["result"])
+                    log_entry.update(
+                        transcription=job["result"]["transcription"],
+                        wer_score=job["result"]["wer_score"]
+                    )
+        record_synthesis(log_entry)
+        
+        return jsonify(response)
         
+    except Rejected as e:
+        return rejection_response(e)
     except Exception as e:
         logger.error(f"Error in synthesis: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/synthesize/stream', methods=['POST'])
+def synthesize_stream():
+    """Stream synthesized speech chunk by chunk as a WAV response"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data or 'model_id' not in data:
+            return jsonify({"status": "error", "message": "Missing required fields: text, model_id"}), 400
+        
+        text = data['text'].strip()
+        model_id = data['model_id']
+        speaker = data.get('speaker', None)
+        
+        if not text:
+            return jsonify({"status": "error", "message": "Text cannot be empty"}), 400
+        
+        if model_id not in tts_service.available_models:
+            return jsonify({"status": "error", "message": f"Unknown model: {model_id}"}), 400
+        if not tts_service.has_speaker(model_id, speaker):
+            return jsonify({"status": "error", "message": f"Unknown speaker for {model_id}: {speaker}"}), 400
+        
+        started = time.perf_counter()
+        max_chars = int(os.environ.get('STREAM_MAX_CHUNK_CHARS', '200'))
+        chunks = prepare_sentences(text, tts_service.get_language(model_id), max_chars)
+        if not chunks:
+            return jsonify({"status": "error", "message": "Text has nothing to synthesize"}), 400
+        logger.info(f"Streaming synthesis in {len(chunks)} chunks with model: {model_id}, speaker: {speaker}")
+        
+        # The stream holds one inference slot until the response is closed
+        ticket = acquire_slot(model_id)
+        
+        # Synthesize the first chunk up front so failures still get a proper error
+        # response and the WAV header can carry the model's sample rate
+        try:
+            first = tts_service.synthesize_audio(chunks[0], model_id, speaker)
+        except Exception:
+            release_slot(ticket)
+            raise
+        if first is None:
+            release_slot(ticket)
+            return jsonify({"status": "error", "message": "Failed to synthesize speech"}), 500
+        
+        def generate():
+            audio_data, sample_rate = first
+            yield wav_header(sample_rate)
+            yield audio_data.tobytes()
+            
+            for chunk in chunks[1:]:
+                result = tts_service.synthesize_audio(chunk, model_id, speaker)
+                if result is None:
+                    logger.error(f"Streaming synthesis stopped at chunk: '{chunk}'")
+                    return
+                audio_data, chunk_rate = result
+                if chunk_rate != sample_rate:
+                    logger.error(f"Sample rate changed mid-stream ({sample_rate} -> {chunk_rate})")
+                    return
+                yield audio_data.tobytes()
+            
+            record_synthesis({
+                "text": text,
+                "model_id": model_id,
+                "speaker": speaker,
+                "latency_ms": (time.perf_counter() - started) * 1000.0,
+                "timestamp": datetime.utcnow(),
+            })
+        
+        response = Response(generate(), mimetype='audio/wav', headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        response.call_on_close(lambda: release_slot(ticket))
+        return response
+        
+    except Rejected as e:
+        return rejection_response(e)
+    except Exception as e:
+        logger.error(f"Error in streaming synthesis: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/audio/<audio_id>')
 def get_audio(audio_id):
-    """Serve audio file"""
+    """Serve audio file
+    
+    ?format=opus|mp3|flac returns a compressed variant when a local encoder is
+    available (WAV otherwise). Responses support Range requests and ETag
+    revalidation; audio ids are content addresses, so they cache well.
+    """
     try:
-        audio_filename = f"{audio_id}.wav"
-        audio_path = os.path.join(tempfile.gettempdir(), audio_filename)
-        
-        if not os.path.exists(audio_path):
+        fmt = request.args.get('format', 'wav').lower()
+        try:
+            audio_path, mimetype = audio_store.resolve(audio_id, fmt)
+        except FileNotFoundError:
             return jsonify({"status": "error", "message": "Audio file not found"}), 404
         
-        return send_file(audio_path, mimetype='audio/wav')
+        return send_file(
+            audio_path,
+            mimetype=mimetype,
+            conditional=True,
+            etag=True,
+            max_age=int(os.environ.get('AUDIO_MAX_AGE', '86400'))
+        )
         
     except Exception as e:
         logger.error(f"Error serving audio {audio_id}: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Poll a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+    return jsonify({"status": "success", "job": job})
+
+@app.route('/api/audio/<audio_id>/evaluation')
+def get_audio_evaluation(audio_id):
+    """Get the evaluation job for a synthesized audio file"""
+    job = job_queue.get_by_key(audio_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "No evaluation for this audio"}), 404
+    return jsonify({"status": "success", "job": job})
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Get synthesis cache hit/miss counters"""
+    return jsonify({
+        "status": "success",
+        "cache": synthesis_cache.get_stats(),
+        "audio_store": audio_store.get_stats(),
+        "single_flight": synthesis_flight.get_stats()
+    })
+
+@app.route('/api/admission/stats')
+def admission_stats():
+    """Get inference queue depth, running and shed counts per model"""
+    return jsonify({"status": "success", "admission": admission.get_stats()})
+
+@app.route('/api/batching/stats')
+def batching_stats():
+    """Get TTS micro-batching metrics per model"""
+    return jsonify({"status": "success", "batching": tts_service.get_batching_stats()})
+
+@app.route('/api/quality/summary')
+def quality_summary():
+    """Rolling WER statistics per model and speaker
+    
+    The aggregates live in this worker's memory and cover only the samples
+    it scored, so with several gunicorn workers each answers for its own
+    share (worker_pid says which); /api/logs/download has every sample.
+    Optional filters: model_id, speaker, hours (look-back window) and
+    buckets=1 for the per-bucket breakdown.
+    """
+    try:
+        hours = request.args.get('hours', type=float)
+        since = time.time() - hours * 3600.0 if hours else None
+        summary = wer_calculator.quality_summary(
+            model_name=request.args.get('model_id'),
+            speaker=request.args.get('speaker'),
+            since=since,
+            include_buckets=request.args.get('buckets') in ('1', 'true', 'yes'),
+        )
+        return jsonify({
+            "status": "success",
+            "scope": "worker",
+            "worker_pid": os.getpid(),
+            "bucket_seconds": wer_calculator.bucket_seconds,
+            "retention_buckets": wer_calculator.retention_buckets,
+            "wer_threshold": float(os.environ.get('WER_THRESHOLD', '0.3')),
+            "summary": summary,
+        })
+    except Exception as e:
+        logger.error(f"Error building quality summary: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+def _parse_log_filters(args, sample):
+    """Build SQLAlchemy filters on a log model from query parameters"""
+    filters = []
+    if args.get('model_id'):
+        filters.append(sample.model_id == args['model_id'])
+    if args.get('speaker'):
+        filters.append(sample.speaker == args['speaker'])
+    if args.get('min_wer') is not None:
+        filters.append(sample.wer_score >= float(args['min_wer']))
+    if args.get('max_wer') is not None:
+        filters.append(sample.wer_score <= float(args['max_wer']))
+    if args.get('since'):
+        filters.append(sample.timestamp >= datetime.fromisoformat(args['since']))
+    if args.get('until'):
+        filters.append(sample.timestamp < datetime.fromisoformat(args['until']))
+    return filters
+
+@app.route('/api/logs')
+def get_logs():
+    """Page through synthesis logs, newest first
+    
+    Keyset pagination: pass the returned next_before_id as before_id to get
+    the next page. Filters: model_id, speaker, min_wer, max_wer, since, until.
+    """
+    try:
+        log = models.SynthesisLog
+        filters = _parse_log_filters(request.args, log)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 1000)
+        if request.args.get('before_id'):
+            filters.append(log.id < int(request.args['before_id']))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Invalid parameter: {str(e)}"}), 400
+    
+    try:
+        rows = db.session.execute(
+            db.select(log).where(*filters).order_by(log.id.desc()).limit(limit)
+        ).scalars().all()
+        return jsonify({
+            "status": "success",
+            "logs": [row.to_dict() for row in rows],
+            "next_before_id": rows[-1].id if len(rows) == limit else None
+        })
+    except Exception as e:
+        logger.error(f"Error fetching logs: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/logs/download')
 def download_logs():
-    """Download poor quality samples CSV"""
+    """Download poor quality samples as CSV
+    
+    Optional filters: model_id, speaker, min_wer, max_wer, since, until
+    (ISO timestamps). Rows are streamed from the database as they are read.
+    """
+    try:
+        filters = _parse_log_filters(request.args, models.PoorQualitySample)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Invalid filter: {str(e)}"}), 400
+    
     try:
-        csv_path = wer_calculator.get_csv_path()
-        if not os.path.exists(csv_path):
-            return jsonify({"status": "error", "message": "No log file found"}), 404
+        # Include samples still sitting in the write buffer
+        log_writer.flush()
         
-        return send_file(csv_path, as_attachment=True, download_name='poor_quality_samples.csv')
+        sample = models.PoorQualitySample
+        query = (
+            db.select(sample)
+            .where(*filters)
+            .order_by(sample.id)
+            .execution_options(yield_per=1000)
+        )
+        
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(['input_text', 'transcribed_text', 'wer_score', 'model_name', 'speaker', 'timestamp'])
+            for row in db.session.execute(query).scalars():
+                writer.writerow([
+                    row.input_text,
+                    row.transcribed_text,
+                    row.wer_score,
+                    row.model_id,
+                    row.speaker,
+                    row.timestamp.isoformat() if row.timestamp else ''
+                ])
+                if buffer.tell() >= 65536:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        
+        return Response(stream_with_context(generate()), mimetype='text/csv', headers={
+            "Content-Disposition": "attachment; filename=poor_quality_samples.csv"
+        })
         
     except Exception as e:
         logger.error(f"Error downloading logs: {str(e)}")
@@ -171,6 +792,17 @@ with app.app_context():
     # Import models here so tables are created
     import models
     db.create_all()
+    models.upgrade_schema()
+    try:
+        # Samples logged to CSV before they went to the database
+        models.import_legacy_samples(wer_calculator.get_csv_path())
+    except Exception as e:
+        logger.error(f"Failed to import legacy poor quality samples: {str(e)}")
+
+# Synthesis logs and poor quality samples go to the database through a
+# buffered batch writer
+log_writer = BufferedWriter(app, db)
+wer_calculator.set_sample_sink(lambda row: log_writer.add(models.PoorQualitySample, row))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,286 @@
+"""Async (ASGI) serving mode.
+
+Connections are held by an event loop instead of a thread or process each;
+the existing Flask routes still handle every request, but they run on
+bounded executors:
+
+    inline     /api/models, /api/speakers, /healthz, /metrics run on the loop
+    inference  /api/synthesize* wait for their admission slot (admission.py,
+               same lanes and deadlines as the WSGI app) on the event loop,
+               then run on a small executor sized to the admitted capacity
+               (or ASGI_INFERENCE_WORKERS); at most ASGI_MAX_PENDING requests
+               wait in total, the rest get 503
+    io         everything else (audio, log downloads, stats) runs on
+               ASGI_IO_WORKERS threads
+
+A queued request therefore costs a coroutine, not a thread, and the Flask
+route skips the admission it would otherwise do itself.
+
+Response bodies are sent one chunk per executor call, so a slow client
+downloading /api/audio or /api/logs/download holds no thread between chunks.
+Run it with any ASGI server, e.g.:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:5000 asgi:app
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+import logging
+import contextvars
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.wsgi import FileWrapper
+from werkzeug.datastructures import Headers
+
+from admission import Rejected
+from app import app as flask_app, admission as flask_admission, lane_for, tts_service, ADMITTED_ENVIRON_KEY
+
+logger = logging.getLogger(__name__)
+
+try:
+    UVICORN_AVAILABLE = importlib.util.find_spec("uvicorn") is not None
+except (ImportError, ValueError):
+    UVICORN_AVAILABLE = False
+
+# (method, path prefix, executor); first match wins, unmatched paths go to io
+ROUTES = (
+    ("GET", "/api/models/status", "io"),
+    ("GET", "/api/models", "inline"),
+    ("GET", "/api/speakers/", "inline"),
+    ("GET", "/healthz", "inline"),
+    ("GET", "/metrics", "inline"),
+    ("POST", "/api/synthesize", "inference"),
+)
+
+_END = object()
+
+
+def _route(method, path):
+    for route_method, prefix, executor in ROUTES:
+        if method == route_method and path.startswith(prefix):
+            return executor
+    return "io"
+
+
+def _write_unsupported(data):
+    raise RuntimeError("The WSGI write() callable is not supported")
+
+
+def _headers(scope):
+    return Headers([(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope.get("headers", [])])
+
+
+def _model_id(body):
+    """model_id from a JSON request body, or None"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data.get("model_id") if isinstance(data, dict) else None
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        # Larger blocks mean fewer executor hops per audio download
+        "wsgi.file_wrapper": lambda filelike, block_size=8192: FileWrapper(filelike, max(block_size, 65536)),
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The whole body has been read; chunked uploads have no Content-Length
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+class AsyncApp:
+    """ASGI application that dispatches the Flask routes onto bounded executors
+
+    admission and lane_for are the Flask app's AdmissionController and lane
+    function; models() returns the model ids currently served.
+    """
+
+    def __init__(self, wsgi_app, admission, lane_for, models, inference_workers=None,
+                 io_workers=None, max_pending=None):
+        self.wsgi_app = wsgi_app
+        self.admission = admission
+        self.lane_for = lane_for
+        self.models = models
+        if inference_workers is None:
+            # Only admitted requests reach the executor
+            inference_workers = os.environ.get('ASGI_INFERENCE_WORKERS') or admission.capacity(models())
+        if io_workers is None:
+            io_workers = int(os.environ.get('ASGI_IO_WORKERS', '16'))
+        if max_pending is None:
+            max_pending = int(os.environ.get('ASGI_MAX_PENDING', '256'))
+        self.max_pending = max_pending
+        self.executors = {
+            "inference": ThreadPoolExecutor(max_workers=max(1, int(inference_workers)), thread_name_prefix="asgi-inference"),
+            "io": ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="asgi-io"),
+        }
+        self.pending = 0  # inference requests waiting for admission or running
+        self.shed = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for executor in self.executors.values():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        kind = _route(scope["method"], scope["path"])
+        if kind != "inference":
+            await self._dispatch(scope, body, kind, receive, send)
+            return
+
+        if self.pending >= self.max_pending:
+            self.shed += 1
+            logger.warning(f"Shed {scope['path']}: {self.pending} inference requests pending")
+            await self._send_overloaded(send)
+            return
+        self.pending += 1
+        ticket = None
+        try:
+            model_id = _model_id(body)
+            extra_environ = {}
+            # Unknown models are left to the route, which answers 400
+            if model_id in self.models():
+                try:
+                    ticket = await self.admission.acquire_async(model_id, self.lane_for(_headers(scope)))
+                except Rejected as e:
+                    logger.warning(f"Shed request ({e.status}): {str(e)}")
+                    await self._send_overloaded(send, e.status, str(e), e.retry_after)
+                    return
+                extra_environ[ADMITTED_ENVIRON_KEY] = model_id
+            await self._dispatch(scope, body, kind, receive, send, extra_environ)
+        finally:
+            if ticket is not None:
+                self.admission.release(ticket)
+            self.pending -= 1
+
+    async def _send_overloaded(self, send, status=503, message="Server busy", retry_after=1):
+        payload = json.dumps({"status": "error", "message": message, "retry_after": retry_after}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"retry-after", str(retry_after).encode("latin-1"))],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _dispatch(self, scope, body, kind, receive, send, extra_environ=None):
+        loop = asyncio.get_running_loop()
+        executor = self.executors.get(kind)
+        # One context per request: Flask's request context is pushed and
+        # popped in it even when chunks are produced on different threads
+        context = contextvars.copy_context()
+
+        async def run(fn, *args):
+            if executor is None:
+                return context.run(fn, *args)
+            return await loop.run_in_executor(executor, context.run, fn, *args)
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+            ]
+            return _write_unsupported
+
+        def call():
+            environ = _environ(scope, body)
+            environ.update(extra_environ or {})
+            result = self.wsgi_app(environ, start_response)
+            return result, iter(result)
+
+        result, chunks = await run(call)
+        # Streamed bodies (e.g. chunked synthesis) keep using the route's
+        # executor; plain files and downloads are read on the io pool
+        if executor is None:
+            executor = self.executors["io"]
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+            while not disconnected.is_set():
+                chunk = await run(next, chunks, _END)
+                if chunk is _END:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            watcher.cancel()
+            if hasattr(result, "close"):
+                # Runs call_on_close callbacks, e.g. releasing an admission slot
+                await run(result.close)
+
+
+app = AsyncApp(flask_app, flask_admission, lane_for, lambda: tts_service.available_models)
+
+
+if __name__ == '__main__':
+    if not UVICORN_AVAILABLE:
+        sys.exit("uvicorn is not installed; run asgi:app with any ASGI server")
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', '5000')))
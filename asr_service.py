@@ -1,71 +1,126 @@
 import os
 import logging
-import sys
-import glob
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import stage
 
 
 logger = logging.getLogger(__name__)
 
+# faster-whisper (and ctranslate2 behind it) is imported when the model is
+# first loaded, not when this module is imported
 try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
-except ImportError:
+    WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+except (ImportError, ValueError):
     WHISPER_AVAILABLE = False
-    WhisperModel = None
 
 class ASRService:
     """Automatic Speech Recognition service using faster-whisper"""
     
     def __init__(self):
         self.model = None
+        self.batched_pipeline = None
         self.model_name = os.environ.get('ASR_MODEL', 'fiifinketia/whisper-large-v3-turbo-akan')
+        self.device = os.environ.get('ASR_DEVICE', 'auto')
+        self.compute_type = os.environ.get('ASR_COMPUTE_TYPE', 'int8')
+        self.cpu_threads = int(os.environ.get('ASR_CPU_THREADS', '0'))  # 0 lets CTranslate2 decide
+        self.num_workers = max(1, int(os.environ.get('ASR_NUM_WORKERS', '1')))
+        self.batch_size = int(os.environ.get('ASR_BATCH_SIZE', '8'))
+        self._load_lock = threading.Lock()
         print(f"ASR Service initialized with model: {self.model_name}")
     
     def _load_model(self):
         """Load the ASR model"""
-        if self.model is None:
-            if not WHISPER_AVAILABLE:
-                print("faster-whisper not available, using mock transcription")
-                return None
-            try:
-                print(f"Loading ASR model: {self.model_name}")
-                self.model = WhisperModel(self.model_name)
-                print("ASR model loaded successfully")
-            except Exception as e:
-                print(f"Failed to load ASR model: {str(e)}")
-                raise
+        with self._load_lock:
+            if self.model is None:
+                if not WHISPER_AVAILABLE:
+                    print("faster-whisper not available, using mock transcription")
+                    return None
+                try:
+                    print(f"Loading ASR model: {self.model_name} ({self.device}, {self.compute_type})")
+                    with stage("asr_model_load", self.model_name):
+                        from faster_whisper import WhisperModel
+                        self.model = WhisperModel(
+                            self.model_name,
+                            device=self.device,
+                            compute_type=self.compute_type,
+                            cpu_threads=self.cpu_threads,
+                            num_workers=self.num_workers,
+                        )
+                    try:
+                        from faster_whisper import BatchedInferencePipeline
+                        self.batched_pipeline = BatchedInferencePipeline(model=self.model)
+                    except ImportError:
+                        # faster-whisper < 1.1; fall back to sequential decoding with VAD
+                        self.batched_pipeline = None
+                    print("ASR model loaded successfully")
+                except Exception as e:
+                    print(f"Failed to load ASR model: {str(e)}")
+                    raise
         return self.model
     
-    def transcribe(self, audio_path):
-        """Transcribe audio file to text"""
+    def transcribe(self, audio):
+        """Transcribe an audio file path or 16 kHz mono float32 numpy array to text"""
         try:
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"Audio file not found: {audio_path}")
-            
-            # Load model
-            model = self._load_model()
-            
-            if not WHISPER_AVAILABLE or model is None:
-                # Return a placeholder transcription when real ASR is not available
-                print("Using mock transcription - faster-whisper not available")
-                return "Mock transcription output for testing purposes"
-            
-            print(f"Transcribing audio: {audio_path}")
-            
-            # Transcribe
-            segments, info = model.transcribe(audio_path)
-            
-            # Combine all segments into one text
-            transcription = ""
-            for segment in segments:
-                transcription += segment.text
-            
-            # Clean up transcription
-            transcription = transcription.strip()
-            
-            print(f"Transcription completed: '{transcription}'")
-            return transcription
-            
+            return self._transcribe_one(audio)
         except Exception as e:
             print(f"Transcription failed: {str(e)}")
             return None
+    
+    def transcribe_batch(self, audios):
+        """Transcribe several inputs (paths or numpy arrays)
+        
+        Each input is split into speech chunks by VAD and its chunks are
+        decoded as one batch; up to ASR_NUM_WORKERS inputs run concurrently.
+        Returns one transcription per input, None where it failed.
+        """
+        if not audios:
+            return []
+        
+        def run(audio):
+            try:
+                return self._transcribe_one(audio)
+            except Exception as e:
+                print(f"Transcription failed: {str(e)}")
+                return None
+        
+        # Load once up front rather than racing to load in every worker
+        self._load_model()
+        if self.num_workers == 1 or len(audios) == 1:
+            return [run(audio) for audio in audios]
+        with ThreadPoolExecutor(max_workers=min(self.num_workers, len(audios)), thread_name_prefix="asr") as executor:
+            return list(executor.map(run, audios))
+    
+    def _transcribe_one(self, audio):
+        if isinstance(audio, (str, os.PathLike)) and not os.path.exists(audio):
+            raise FileNotFoundError(f"Audio file not found: {audio}")
+        
+        # Load model
+        model = self._load_model()
+        
+        if not WHISPER_AVAILABLE or model is None:
+            # Return a placeholder transcription when real ASR is not available
+            print("Using mock transcription - faster-whisper not available")
+            return "Mock transcription output for testing purposes"
+        
+        if isinstance(audio, np.ndarray):
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+            logger.debug(f"Transcribing {len(audio)} in-memory samples")
+        else:
+            logger.debug(f"Transcribing audio: {audio}")
+        
+        # Transcribe
+        if self.batched_pipeline is not None:
+            segments, info = self.batched_pipeline.transcribe(audio, batch_size=self.batch_size)
+        else:
+            segments, info = model.transcribe(audio, vad_filter=True)
+        
+        # Combine all segments into one text
+        transcription = "".join(segment.text for segment in segments).strip()
+        
+        logger.debug(f"Transcription completed: {len(transcription)} characters")
+        return transcription
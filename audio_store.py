@@ -0,0 +1,151 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# format -> (file extension, mimetype, ffmpeg codec arguments)
+COMPRESSED_FORMATS = {
+    "opus": ("ogg", "audio/ogg", ["-c:a", "libopus", "-b:a", "32k"]),
+    "mp3": ("mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", "64k"]),
+    "flac": ("flac", "audio/flac", ["-c:a", "flac"]),
+}
+
+# Scratch files younger than this belong to a synthesis still in progress
+PARTIAL_GRACE_SECONDS = 3600
+
+
+class AudioStore:
+    """Directory of audio artifacts with TTL/size garbage collection and compressed variants
+
+    WAV masters are written by the synthesis cache; compressed variants are
+    encoded from them with a local ffmpeg on first request (or ahead of time
+    via encode()) and kept next to the master.
+    """
+
+    def __init__(self, directory=None, ttl_seconds=None, max_bytes=None, gc_interval=None):
+        self.directory = directory or os.environ.get('AUDIO_STORE_DIR') or os.environ.get(
+            'SYNTHESIS_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'kasa_mframa_cache')
+        )
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('AUDIO_TTL_HOURS', '24')) * 3600
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('AUDIO_STORE_MAX_MB', '2048')) * 1024 * 1024
+        if gc_interval is None:
+            gc_interval = float(os.environ.get('AUDIO_GC_INTERVAL', '300'))
+        self.ttl_seconds = ttl_seconds  # 0 disables expiry
+        self.max_bytes = max_bytes
+        self.gc_interval = gc_interval
+        self.on_delete = None  # called with the audio id of every removed WAV master
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.removed_files = 0
+        self.removed_bytes = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        if self.gc_interval > 0:
+            threading.Thread(target=self._gc_loop, name="audio-gc", daemon=True).start()
+
+    def path_for(self, audio_id, extension="wav"):
+        return os.path.join(self.directory, f"{audio_id}.{extension}")
+
+    def available_formats(self):
+        """Formats that can be served; compressed ones need ffmpeg"""
+        return ["wav"] + (list(COMPRESSED_FORMATS) if self.ffmpeg else [])
+
+    def resolve(self, audio_id, fmt="wav"):
+        """Return (path, mimetype) for an audio id in the requested format
+
+        Falls back to the WAV master when the format cannot be produced.
+        Raises FileNotFoundError when the audio does not exist.
+        """
+        source = self.path_for(audio_id)
+        if fmt in COMPRESSED_FORMATS and self.ffmpeg:
+            extension, mimetype, _ = COMPRESSED_FORMATS[fmt]
+            encoded = self.path_for(audio_id, extension)
+            if os.path.exists(encoded) or self.encode(audio_id, fmt):
+                return encoded, mimetype
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+        return source, "audio/wav"
+
+    def encode(self, audio_id, fmt):
+        """Encode the WAV master into a compressed format; returns True on success"""
+        if fmt not in COMPRESSED_FORMATS or not self.ffmpeg:
+            return False
+        source = self.path_for(audio_id)
+        if not os.path.exists(source):
+            return False
+
+        extension, _, codec_args = COMPRESSED_FORMATS[fmt]
+        target = self.path_for(audio_id, extension)
+        scratch = f"{target}.{os.getpid()}.{threading.get_ident()}.partial"
+        try:
+            subprocess.run(
+                [self.ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-i", source,
+                 *codec_args, "-f", extension, scratch],
+                check=True, capture_output=True, timeout=60,
+            )
+            os.replace(scratch, target)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to encode {audio_id} as {fmt}: {str(e)}")
+            if os.path.exists(scratch):
+                os.remove(scratch)
+            return False
+
+    def _gc_loop(self):
+        while True:
+            time.sleep(self.gc_interval)
+            try:
+                self.gc()
+            except Exception as e:
+                logger.error(f"Audio store GC failed: {str(e)}")
+
+    def gc(self):
+        """Delete expired artifacts, then the oldest ones until under the size budget"""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith('.partial') or '.partial.' in entry.name:
+                if now - stat.st_mtime > PARTIAL_GRACE_SECONDS:
+                    self._remove(entry.path, entry.name, stat.st_size)
+                continue
+            if self.ttl_seconds and now - stat.st_mtime > self.ttl_seconds:
+                self._remove(entry.path, entry.name, stat.st_size)
+                continue
+            files.append((stat.st_mtime, entry.path, entry.name, stat.st_size))
+
+        total = sum(size for _, _, _, size in files)
+        for _, path, name, size in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path, name, size)
+            total -= size
+
+    def _remove(self, path, name, size):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        self.removed_files += 1
+        self.removed_bytes += size
+        if name.endswith('.wav') and '.partial' not in name and self.on_delete is not None:
+            self.on_delete(name[:-len('.wav')])
+
+    def get_stats(self):
+        return {
+            "directory": self.directory,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+            "formats": self.available_formats(),
+            "removed_files": self.removed_files,
+            "removed_bytes": self.removed_bytes,
+        }
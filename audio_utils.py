@@ -0,0 +1,116 @@
+import math
+import wave
+import struct
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Size field value for WAV streams whose final length is not known up front
+STREAMING_WAV_SIZE = 0xFFFFFFFF
+
+# Whisper models take 16 kHz mono float32
+ASR_SAMPLE_RATE = 16000
+
+
+def to_int16(audio_data):
+    """Convert model output (list, tensor or float array) to a mono int16 array"""
+    # Handle different audio data formats
+    if isinstance(audio_data, list):
+        audio_data = np.array(audio_data)
+    elif hasattr(audio_data, 'numpy'):
+        audio_data = audio_data.numpy()
+
+    # Ensure audio data is in the right format
+    if len(audio_data.shape) > 1:
+        audio_data = audio_data[0]  # Take first channel if stereo
+
+    # Normalize audio data
+    if audio_data.dtype != np.int16:
+        audio_data = (audio_data * 32767).astype(np.int16)
+
+    return audio_data
+
+
+def wav_header(sample_rate, num_samples=None, channels=1, sample_width=2):
+    """Build a 44-byte PCM WAV header
+
+    With num_samples=None the RIFF and data sizes are set to the streaming
+    sentinel so players read until the connection closes.
+    """
+    if num_samples is None:
+        riff_size = data_size = STREAMING_WAV_SIZE
+    else:
+        data_size = num_samples * channels * sample_width
+        riff_size = 36 + data_size
+
+    byte_rate = sample_rate * channels * sample_width
+    block_align = channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', riff_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, byte_rate, block_align, sample_width * 8,
+        b'data', data_size,
+    )
+
+
+def wav_bytes(audio_data, sample_rate):
+    """Encode an int16 waveform as a complete WAV file in memory
+
+    The PCM samples are read through a memoryview of the numpy buffer, so the
+    only copy is the single one into the returned bytes object (WSGI servers
+    require bytes, not views).
+    """
+    pcm = np.ascontiguousarray(audio_data, dtype='<i2')
+    return b"".join((wav_header(sample_rate, len(pcm)), memoryview(pcm).cast('B')))
+
+
+def read_wav(path):
+    """Read a 16-bit PCM WAV file into (int16 waveform, sample_rate)"""
+    with wave.open(path, 'rb') as wav_file:
+        sample_rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        audio = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+    if channels > 1:
+        audio = audio[::channels]  # Take first channel if stereo
+    return audio, sample_rate
+
+
+def concatenate(waveforms, sample_rate, gap_ms=0):
+    """Join int16 waveforms into one, with gap_ms of silence between them"""
+    if len(waveforms) == 1:
+        return waveforms[0]
+    gap = np.zeros(int(sample_rate * gap_ms / 1000.0), dtype=np.int16)
+    parts = []
+    for index, waveform in enumerate(waveforms):
+        if index and len(gap):
+            parts.append(gap)
+        parts.append(np.asarray(waveform, dtype=np.int16))
+    return np.concatenate(parts)
+
+
+def to_asr_input(audio_data, sample_rate, target_rate=ASR_SAMPLE_RATE):
+    """Convert a synthesized waveform to 16 kHz mono float32 for ASR
+
+    Resamples in one polyphase pass (22050 -> 16000 Hz is up 320, down 441),
+    so TTS output can go to ASRService without a WAV write, read and decode.
+    """
+    audio = np.asarray(audio_data)
+    if audio.ndim > 1:
+        audio = audio[0]  # Take first channel if stereo
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    else:
+        audio = audio.astype(np.float32, copy=False)
+
+    if sample_rate != target_rate:
+        divisor = math.gcd(int(sample_rate), int(target_rate))
+        try:
+            from scipy.signal import resample_poly
+            audio = resample_poly(audio, target_rate // divisor, sample_rate // divisor)
+        except ImportError:
+            logger.warning("scipy not available, resampling with linear interpolation")
+            length = int(round(len(audio) * target_rate / sample_rate))
+            audio = np.interp(np.arange(length) * (sample_rate / target_rate), np.arange(len(audio)), audio)
+    return audio.astype(np.float32, copy=False)
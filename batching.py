@@ -0,0 +1,144 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to stop the worker once earlier requests are done
+_STOP = object()
+
+
+class _Request:
+    """A queued synthesis request waiting for its batch"""
+
+    __slots__ = ("item", "group", "future", "enqueued_at", "traces")
+
+    def __init__(self, item, group):
+        self.item = item
+        self.group = group
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        # The submitting request's traces; the batch's stages are reported to them
+        self.traces = metrics.current_traces()
+
+
+class MicroBatcher:
+    """Collects requests arriving within a short window and runs them as one batch
+
+    run_batch(group, items) must return one result per item, in order. Requests
+    are only batched with others of the same group (e.g. the same speaker id),
+    since a single forward pass can only condition on one group.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=None, window_ms=None):
+        self.name = name
+        self.run_batch = run_batch
+        if max_batch_size is None:
+            max_batch_size = int(os.environ.get('TTS_BATCH_MAX_SIZE', '8'))
+        if window_ms is None:
+            window_ms = float(os.environ.get('TTS_BATCH_WINDOW_MS', '10'))
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._errors = 0
+        self._batch_sizes = defaultdict(int)
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, item, group=None):
+        """Queue an item and return a Future for its result"""
+        request = _Request(item, group)
+        self._queue.put(request)
+        return request.future
+
+    def close(self):
+        """Stop the worker after the requests already queued have run"""
+        self._queue.put(_STOP)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            groups = defaultdict(list)
+            for request in batch:
+                groups[request.group].append(request)
+
+            for group, requests in groups.items():
+                self._dispatch(group, requests)
+
+    def _dispatch(self, group, requests):
+        started = time.perf_counter()
+        waits = [started - request.enqueued_at for request in requests]
+        traces = {trace for request in requests for trace in request.traces}
+        try:
+            with metrics.use_traces(traces):
+                results = self.run_batch(group, [request.item for request in requests])
+            if len(results) != len(requests):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(requests)} requests")
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Batch failed for {self.name}: {str(e)}")
+            with self._stats_lock:
+                self._errors += 1
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(requests)
+            self._batch_sizes[len(requests)] += 1
+            self._queue_wait_total += sum(waits)
+            self._queue_wait_max = max(self._queue_wait_max, max(waits))
+
+    def get_stats(self):
+        """Return batch size and queue wait metrics"""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "window_ms": self.window * 1000.0,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "errors": self._errors,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": 1000.0 * self._queue_wait_total / self._requests if self._requests else 0.0,
+                "max_queue_wait_ms": 1000.0 * self._queue_wait_max,
+            }
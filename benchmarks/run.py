@@ -0,0 +1,380 @@
+"""Latency/throughput benchmarks for the services and the HTTP API.
+
+    python benchmarks/run.py --suite all --lengths 20,100,400 --concurrency 1,4,16
+    python benchmarks/run.py --suite http --url http://127.0.0.1:5000 --models facebook_mms-tts-aka
+    python benchmarks/run.py --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+The services suite calls TTSService.synthesize, ASRService.transcribe and
+WERCalculator.calculate_wer directly; the http suite drives /api/synthesize
+with concurrent clients, in-process through the Flask test client unless
+--url points at a running server. Every scenario reports throughput,
+p50/p95/p99 latency and peak RSS (with --url, the server's as read from
+its /metrics), and the run is saved as JSON named after the current
+commit so results can be compared across revisions.
+
+Models whose weights are not available locally (or every model, with
+--stub) are replaced by stub models that go through the service's
+fallback tone generator, so the suite also runs offline.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_pool import rss_bytes  # noqa: E402
+from evaluate_corpus import percentile  # noqa: E402
+
+# Word list for generated inputs (Akan)
+SAMPLE_WORDS = [
+    "akwaaba", "me", "din", "de", "kofi", "wo", "ho", "te", "sɛn", "ɛyɛ",
+    "medaase", "yɛfrɛ", "no", "kasa", "mframa", "ɔkyerɛkyerɛfo", "sukuu", "abɔfra",
+    "nsuo", "aduane", "fie", "kurom", "adwuma", "ɛnnɛ", "ɔkyena", "nnipa",
+]
+
+
+def make_text(length, rng):
+    """Deterministic pseudo-sentence of roughly length characters"""
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(SAMPLE_WORDS))
+    return " ".join(words).capitalize() + "."
+
+
+class PeakRSS:
+    """Samples RSS in the background while a scenario runs
+
+    read() returns the current RSS in bytes; by default this process's.
+    """
+
+    def __init__(self, interval=0.02, read=rss_bytes):
+        self.interval = interval
+        self.read = read
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = self.read()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.read())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.read())
+
+
+def run_scenario(fn, inputs, concurrency, read_rss=rss_bytes, rss_source="process"):
+    """Call fn on every input with the given concurrency; return measurements
+
+    rss_source labels whose memory read_rss measures ("process" for this
+    one, "server" or "client" when benchmarking a remote server).
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(item):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = fn(item)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok is False or ok is None:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    with PeakRSS(interval=0.02 if read_rss is rss_bytes else 0.25, read=read_rss) as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(call, inputs))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(inputs),
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_per_s": len(latencies) / wall if wall else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "mean_ms": _ms(sum(latencies) / len(latencies)) if latencies else None,
+        "peak_rss_bytes": rss.peak,
+        "rss_source": rss_source,
+    }
+
+
+def _ms(seconds):
+    return seconds * 1000 if seconds is not None else None
+
+
+def weights_available(model_info):
+    """Whether a model can be loaded without network access"""
+    import tts_service
+    if model_info["type"] == "transformers":
+        if not tts_service.TORCH_AVAILABLE:
+            return False
+        try:
+            from huggingface_hub import try_to_load_from_cache
+        except ImportError:
+            return False
+        return isinstance(try_to_load_from_cache(model_info["hf_id"], "config.json"), str)
+    if model_info["type"] == "coqui":
+        return bool(model_info.get("model_path")) and os.path.exists(model_info["model_path"])
+    return True
+
+
+def resolve_models(tts, model_ids, force_stub=False):
+    """Map requested model ids to loadable ones, registering stubs as needed
+
+    Returns [(requested_id, benchmarked_id, is_stub)].
+    """
+    resolved = []
+    for model_id in model_ids:
+        model_info = tts.available_models.get(model_id)
+        if model_info is None:
+            raise SystemExit(f"Unknown model: {model_id}")
+        if not force_stub and weights_available(model_info):
+            resolved.append((model_id, model_id, False))
+            continue
+        stub_id = f"stub:{model_id}"
+        tts.available_models[stub_id] = {
+            "name": f"{model_info['name']} (stub)",
+            "type": "stub",
+            "speakers": model_info["speakers"],
+        }
+        resolved.append((model_id, stub_id, True))
+    return resolved
+
+
+def bench_services(args, rng):
+    from tts_service import TTSService
+    from asr_service import ASRService, WHISPER_AVAILABLE
+    from evaluation import WERCalculator
+
+    tts = TTSService()
+    asr = ASRService()
+    wer = WERCalculator()
+    results = []
+    workdir = tempfile.mkdtemp(prefix="kasa_mframa_bench_")
+    counter = iter(range(10 ** 9))
+
+    for requested, model_id, stub in resolve_models(tts, args.models, args.stub):
+        speaker = (tts.available_models[model_id]["speakers"] or [None])[0]
+        # Load outside the measured scenarios
+        tts.synthesize("warm up", model_id, os.path.join(workdir, "warmup.wav"), speaker)
+
+        for length in args.lengths:
+            texts = [make_text(length, rng) for _ in range(args.requests)]
+            audio_path = os.path.join(workdir, f"sample_{length}.wav")
+            tts.synthesize(texts[0], model_id, audio_path, speaker)
+
+            for concurrency in args.concurrency:
+                def synthesize(text):
+                    path = os.path.join(workdir, f"{next(counter)}.wav")
+                    try:
+                        return tts.synthesize(text, model_id, path, speaker)
+                    finally:
+                        if os.path.exists(path):
+                            os.remove(path)
+
+                results.append(dict(
+                    run_scenario(synthesize, texts, concurrency),
+                    suite="services", target="tts.synthesize", model_id=requested,
+                    stub=stub, text_length=length, concurrency=concurrency,
+                ))
+                results.append(dict(
+                    run_scenario(lambda _: asr.transcribe(audio_path), range(args.requests), concurrency),
+                    suite="services", target="asr.transcribe", model_id=requested,
+                    stub=not WHISPER_AVAILABLE, text_length=length, concurrency=concurrency,
+                ))
+                hypotheses = [make_text(length, rng) for _ in texts]
+                results.append(dict(
+                    run_scenario(lambda pair: wer.calculate_wer(*pair), list(zip(texts, hypotheses)), concurrency),
+                    suite="services", target="wer.calculate_wer", model_id=requested,
+                    stub=False, text_length=length, concurrency=concurrency,
+                ))
+                _print_result(results[-3:])
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def bench_http(args, rng):
+    results = []
+    if args.url:
+        import urllib.request
+        models = [(model_id, model_id, False) for model_id in args.models]
+
+        def post(body):
+            request = urllib.request.Request(
+                f"{args.url.rstrip('/')}/api/synthesize",
+                data=json.dumps(body).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request, timeout=300) as response:
+                response.read()
+                return response.status == 200
+
+        def server_rss():
+            """The server's process_resident_memory_bytes from /metrics"""
+            with urllib.request.urlopen(f"{args.url.rstrip('/')}/metrics", timeout=10) as response:
+                for line in response.read().decode().splitlines():
+                    if line.startswith("process_resident_memory_bytes "):
+                        return int(float(line.split()[1]))
+            raise ValueError("no process_resident_memory_bytes in /metrics")
+
+        try:
+            server_rss()
+            read_rss, rss_source = server_rss, "server"
+        except Exception:
+            # Older servers do not export their RSS; measure (and say) the client's
+            read_rss, rss_source = rss_bytes, "client"
+    else:
+        # In-process server with its own throwaway database and audio store
+        scratch = tempfile.mkdtemp(prefix="kasa_mframa_bench_http_")
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(scratch, 'bench.db')}")
+        os.environ.setdefault("SYNTHESIS_CACHE_DIR", os.path.join(scratch, "audio"))
+        import app as web
+        models = resolve_models(web.tts_service, args.models, args.stub)
+        read_rss, rss_source = rss_bytes, "process"
+        local = threading.local()
+
+        def post(body):
+            if not hasattr(local, "client"):
+                local.client = web.app.test_client()
+            response = local.client.post("/api/synthesize", json=body)
+            response.get_data()
+            return response.status_code == 200
+
+    counter = iter(range(10 ** 9))
+    for requested, model_id, stub in models:
+        for length in args.lengths:
+            texts = [make_text(length, rng) for _ in range(args.requests)]
+            for concurrency in args.concurrency:
+                def call(text):
+                    # A unique suffix keeps the synthesis cache from answering
+                    body = {"text": f"{text} {next(counter)}", "model_id": model_id}
+                    if args.response_audio:
+                        body["response"] = "audio"
+                    return post(body)
+
+                results.append(dict(
+                    run_scenario(call, texts, concurrency, read_rss, rss_source),
+                    suite="http", target="POST /api/synthesize", model_id=requested,
+                    stub=stub, text_length=length, concurrency=concurrency,
+                    url=args.url, response_audio=args.response_audio,
+                ))
+                _print_result(results[-1:])
+    return results
+
+
+def _print_result(results):
+    for r in results:
+        print(f"{r['target']:<22} model={r['model_id']} len={r['text_length']} c={r['concurrency']}: "
+              f"{r['throughput_per_s'] or 0:.1f}/s p50={r['p50_ms'] or 0:.1f}ms p95={r['p95_ms'] or 0:.1f}ms "
+              f"p99={r['p99_ms'] or 0:.1f}ms errors={r['errors']} {r.get('rss_source', 'process')}_rss={r['peak_rss_bytes'] / 2 ** 20:.0f}MiB")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline_path, current_path):
+    """Print throughput and latency changes between two result files"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(current_path, encoding="utf-8") as f:
+        current = json.load(f)
+
+    def key(r):
+        return (r["suite"], r["target"], r["model_id"], r["text_length"], r["concurrency"])
+
+    before = {key(r): r for r in baseline["results"]}
+    print(f"{baseline['revision']} -> {current['revision']}")
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        changes = []
+        for field in ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms"):
+            if old[field] and r[field] is not None:
+                changes.append(f"{field} {100.0 * (r[field] - old[field]) / old[field]:+.1f}%")
+        print(f"{' '.join(str(part) for part in key(r))}: {', '.join(changes)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TTS/ASR/WER services and the HTTP API")
+    parser.add_argument("--suite", choices=("services", "http", "all"), default="all")
+    parser.add_argument("--models", default="facebook_mms-tts-aka", help="Comma-separated model ids")
+    parser.add_argument("--lengths", default="20,100,400", help="Comma-separated input lengths in characters")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--stub", action="store_true", help="Use stub models even when weights are available")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of an in-process app")
+    parser.add_argument("--response-audio", action="store_true", help="Request WAV bytes in the response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<revision>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    args.models = [m.strip() for m in args.models.split(",") if m.strip()]
+    args.lengths = [int(n) for n in args.lengths.split(",")]
+    args.concurrency = [int(n) for n in args.concurrency.split(",")]
+    rng = random.Random(args.seed)
+
+    results = []
+    if args.suite in ("services", "all"):
+        results += bench_services(args, rng)
+    if args.suite in ("http", "all"):
+        results += bench_http(args, rng)
+
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "models": args.models, "lengths": args.lengths, "concurrency": args.concurrency,
+            "requests": args.requests, "seed": args.seed, "stub": args.stub,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{revision}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
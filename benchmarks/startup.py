@@ -0,0 +1,99 @@
+"""Measure server cold start: process launch to first /healthz and /readyz answer.
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+
+Each run starts a fresh gunicorn (or, with --dev, `python main.py`-style
+Flask) process on a free port, polls the probes and kills the process.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, deadline, process):
+    """Poll url until it answers 200; returns the elapsed time or None"""
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.monotonic()
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_once(dev=False, timeout=300.0):
+    port = free_port()
+    if dev:
+        command = [sys.executable, "-c",
+                   f"from app import app; app.run(host='127.0.0.1', port={port})"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "main:app"]
+
+    started = time.monotonic()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        base = f"http://127.0.0.1:{port}"
+        healthy = wait_for(f"{base}/healthz", deadline, process)
+        ready = wait_for(f"{base}/readyz", deadline, process) if healthy else None
+        return {
+            "healthz_seconds": healthy - started if healthy else None,
+            "readyz_seconds": ready - started if ready else None,
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure server startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--dev", action="store_true", help="Use the Flask development server instead of gunicorn")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for each probe")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for run in range(args.runs):
+        result = measure_once(dev=args.dev, timeout=args.timeout)
+        runs.append(result)
+        print(f"run {run + 1}: healthz {result['healthz_seconds']}, readyz {result['readyz_seconds']}")
+
+    healthz = sorted(r["healthz_seconds"] for r in runs if r["healthz_seconds"] is not None)
+    readyz = sorted(r["readyz_seconds"] for r in runs if r["readyz_seconds"] is not None)
+    report = {
+        "runs": runs,
+        "median_healthz_seconds": healthz[len(healthz) // 2] if healthz else None,
+        "median_readyz_seconds": readyz[len(readyz) // 2] if readyz else None,
+        "env": {name: os.environ[name] for name in ("TTS_PRELOAD_MODELS", "INFERENCE_SOCKET") if name in os.environ},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "runs"}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import os
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from sqlalchemy import insert, bindparam
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """Buffers rows in memory and bulk-inserts them from a background thread
+
+    Request handlers call add() and return immediately; rows are flushed every
+    DB_FLUSH_INTERVAL seconds or as soon as DB_FLUSH_BATCH rows are waiting.
+    update() queues changes to rows matched by a key column; each flush runs
+    its inserts before its updates.
+    """
+
+    def __init__(self, app, db, flush_interval=None, batch_size=None, max_buffer=None):
+        self.app = app
+        self.db = db
+        self.flush_interval = flush_interval or float(os.environ.get('DB_FLUSH_INTERVAL', '1.0'))
+        self.batch_size = batch_size or int(os.environ.get('DB_FLUSH_BATCH', '500'))
+        self.max_buffer = max_buffer or int(os.environ.get('DB_MAX_BUFFER', '100000'))
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def add(self, model, row):
+        """Queue a row (dict of column values) for insertion into model's table"""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # The database is not keeping up; shed the oldest row
+                self._buffer.pop(0)
+                self.dropped += 1
+            self._buffer.append((model, row))
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def update(self, model, key_column, key, values):
+        """Queue values (dict of column values) for the rows of model whose key_column equals key"""
+        self.add(model, {"__update__": (key_column, key, values)})
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far in one transaction per flush"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+
+            rows_by_model = defaultdict(list)
+            updates = defaultdict(list)  # (model, key column, value columns) -> params
+            for model, row in pending:
+                if "__update__" in row:
+                    key_column, key, values = row["__update__"]
+                    params = {f"v_{name}": value for name, value in values.items()}
+                    params["k_key"] = key
+                    updates[(model, key_column, tuple(sorted(values)))].append(params)
+                else:
+                    rows_by_model[model].append(row)
+
+            try:
+                with self.app.app_context():
+                    for model, rows in rows_by_model.items():
+                        self.db.session.execute(insert(model), rows)
+                    for (model, key_column, columns), params in updates.items():
+                        table = model.__table__
+                        statement = (
+                            table.update()
+                            .where(table.c[key_column] == bindparam("k_key"))
+                            .values({name: bindparam(f"v_{name}") for name in columns})
+                        )
+                        self.db.session.execute(statement, params)
+                    self.db.session.commit()
+                self.written += len(pending)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(pending)} buffered rows: {str(e)}")
+                self.failed_flushes += 1
+                with self.app.app_context():
+                    self.db.session.rollback()
+                # Put the rows back so they go out with the next flush
+                with self._lock:
+                    room = max(0, self.max_buffer - len(self._buffer))
+                    self.dropped += max(0, len(pending) - room)
+                    self._buffer[:0] = pending[-room:] if room else []
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "buffered": len(self._buffer),
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed_flushes": self.failed_flushes,
+            }
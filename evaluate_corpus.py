@@ -0,0 +1,306 @@
+"""Batched offline evaluation of a TTS model over a text corpus.
+
+Runs every sample through the same text front-end as /api/synthesize,
+synthesizes it with TTSService, transcribes the audio with ASRService and
+scores it against the normalized text with WERCalculator:
+
+    python evaluate_corpus.py corpus.txt --model facebook_mms-tts-aka --output results.jsonl
+
+The corpus is either plain text (one sentence per line) or JSONL with a text
+field. TTS and ASR run as separate pipeline stages connected by bounded
+queues; synthesized audio is handed to ASR in memory (resampled to 16 kHz)
+and only written to disk with --keep-audio. Results are appended to the output file as they complete, so an
+interrupted run picks up where it stopped when started again with the same
+output path.
+"""
+import os
+import sys
+import json
+import math
+import queue
+import argparse
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_service import TTSService
+from asr_service import ASRService
+from evaluation import WERCalculator
+from audio_utils import wav_bytes, to_asr_input, concatenate
+from text_frontend import prepare_sentences
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def load_corpus(path, text_field="text", id_field="id"):
+    """Return [(sample_id, text)] from a plain text or JSONL corpus"""
+    samples = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                record = json.loads(line)
+                text = record.get(text_field)
+                sample_id = str(record.get(id_field, line_number))
+            else:
+                text = line
+                sample_id = str(line_number)
+            if text and text.strip():
+                samples.append((sample_id, text.strip()))
+    return samples
+
+
+def load_results(output_path):
+    """Return {id: result} from a results file, keeping the latest row per id"""
+    results = {}
+    if not os.path.exists(output_path):
+        return results
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                results[result["id"]] = result
+            except (ValueError, KeyError, TypeError):
+                # Partially written last line from an interrupted run
+                continue
+    return results
+
+
+def load_completed(output_path):
+    """Return ids a previous run scored; failed samples are retried"""
+    return {
+        sample_id for sample_id, result in load_results(output_path).items()
+        if result.get("wer_score") is not None
+    }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list: the ceil(q/100 * n)-th value"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(q * len(values) / 100.0) - 1))
+    return values[index]
+
+
+def summarize(output_path, threshold):
+    """Aggregate statistics over every result in the output file"""
+    scores = []
+    failures = 0
+    errors = 0
+    reference_words = 0
+    # A retried sample counts once, with its latest result
+    for result in load_results(output_path).values():
+        if result.get("wer_score") is None:
+            failures += 1
+        else:
+            scores.append(result["wer_score"])
+            errors += result.get("substitutions", 0) + result.get("deletions", 0) + result.get("insertions", 0)
+            reference_words += result.get("reference_words", 0)
+
+    scores.sort()
+    return {
+        "samples": len(scores) + failures,
+        "scored": len(scores),
+        "failures": failures,
+        "mean_wer": sum(scores) / len(scores) if scores else None,
+        "corpus_wer": errors / reference_words if reference_words else None,
+        "median_wer": percentile(scores, 50),
+        "p90_wer": percentile(scores, 90),
+        "threshold": threshold,
+        "above_threshold": sum(1 for score in scores if score > threshold),
+    }
+
+
+class CorpusEvaluator:
+    """Two-stage TTS -> ASR pipeline over a corpus"""
+
+    def __init__(self, model_id, speaker=None, tts_workers=None, asr_batch_size=8,
+                 queue_size=32, audio_dir=None, keep_audio=False, threshold=0.3):
+        self.model_id = model_id
+        self.speaker = speaker
+        self.tts_workers = tts_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.asr_batch_size = asr_batch_size
+        self.queue_size = queue_size
+        self.keep_audio = keep_audio
+        self.audio_dir = audio_dir
+        self.threshold = threshold
+        self.sentence_gap_ms = float(os.environ.get('TTS_SENTENCE_GAP_MS', '120'))
+
+        self.tts_service = TTSService()
+        self.asr_service = ASRService()
+        self.wer_calculator = WERCalculator()
+
+        if model_id not in self.tts_service.available_models:
+            raise ValueError(f"Unknown model: {model_id}")
+
+    def run(self, samples, output_path):
+        """Evaluate samples, appending one JSON line per sample to output_path"""
+        if self.keep_audio:
+            self.audio_dir = self.audio_dir or tempfile.mkdtemp(prefix='kasa_mframa_eval_')
+            os.makedirs(self.audio_dir, exist_ok=True)
+        synthesized = queue.Queue(maxsize=self.queue_size)
+        # Bounds the number of sentences in flight inside the TTS stage
+        tts_slots = threading.Semaphore(self.queue_size)
+
+        def synthesize(sample_id, text):
+            audio = None
+            reference = None
+            try:
+                # Same front-end as /api/synthesize: split, normalize, join with gaps
+                sentences = prepare_sentences(text, self.tts_service.get_language(self.model_id))
+                reference = " ".join(sentences)
+                result = self._synthesize_sentences(sentences) if sentences else None
+                if result is not None:
+                    audio_data, sample_rate = result
+                    if self.keep_audio:
+                        with open(os.path.join(self.audio_dir, f"{sample_id}.wav"), 'wb') as f:
+                            f.write(wav_bytes(audio_data, sample_rate))
+                    audio = to_asr_input(audio_data, sample_rate)
+            except Exception as e:
+                logger.error(f"Synthesis of sample {sample_id} failed: {str(e)}")
+            finally:
+                synthesized.put((sample_id, text, reference, audio))
+                tts_slots.release()
+
+        def produce():
+            with ThreadPoolExecutor(max_workers=self.tts_workers, thread_name_prefix="tts") as executor:
+                for sample_id, text in samples:
+                    tts_slots.acquire()
+                    executor.submit(synthesize, sample_id, text)
+            synthesized.put(_DONE)
+
+        producer = threading.Thread(target=produce, name="tts-stage", daemon=True)
+        producer.start()
+
+        processed = 0
+        with open(output_path, 'a', encoding='utf-8') as output:
+            finished = False
+            while not finished:
+                # Gather a batch for the ASR stage
+                batch = [synthesized.get()]
+                while len(batch) < self.asr_batch_size and batch[-1] is not _DONE:
+                    try:
+                        batch.append(synthesized.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _DONE:
+                    batch.pop()
+                    finished = True
+
+                for result in self._score_batch(batch):
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    processed += 1
+                output.flush()
+                if processed and batch:
+                    print(f"Evaluated {processed}/{len(samples)} samples")
+
+        producer.join()
+        return processed
+
+    def _synthesize_sentences(self, sentences):
+        """Synthesize normalized sentences into one waveform, or None on failure"""
+        results = []
+        for sentence in sentences:
+            result = self.tts_service.synthesize_audio(sentence, self.model_id, self.speaker)
+            if result is None:
+                return None
+            results.append(result)
+        sample_rate = results[0][1]
+        if any(rate != sample_rate for _, rate in results):
+            logger.error(f"Sentences came back at different sample rates for {self.model_id}")
+            return None
+        return concatenate([audio for audio, _ in results], sample_rate, self.sentence_gap_ms), sample_rate
+
+    def _score_batch(self, batch):
+        """Transcribe and score a batch of synthesized samples against their normalized text"""
+        results = []
+        for sample_id, text, reference, audio in batch:
+            result = {
+                "id": sample_id,
+                "text": text,
+                "normalized_text": reference,
+                "model_id": self.model_id,
+                "speaker": self.speaker,
+                "transcription": None,
+                "wer_score": None,
+            }
+            if audio is None:
+                result["error"] = "synthesis failed"
+            results.append(result)
+
+        # Transcribe the whole batch in one call, straight from memory
+        synthesized = [(result, audio) for result, (_, _, _, audio) in zip(results, batch) if audio is not None]
+        transcriptions = self.asr_service.transcribe_batch([audio for _, audio in synthesized])
+        for (result, _), transcription in zip(synthesized, transcriptions):
+            if transcription is None:
+                result["error"] = "transcription failed"
+            else:
+                result["transcription"] = transcription
+
+        # Score the whole batch in one vectorized pass
+        scored = [result for result in results if result["transcription"] is not None]
+        measures = self.wer_calculator.measure_batch(
+            [result["normalized_text"] for result in scored],
+            [result["transcription"] for result in scored],
+        )
+        for result, measure in zip(scored, measures):
+            result["wer_score"] = measure["wer"]
+            result["cer"] = measure["cer"]
+            for field in ("hits", "substitutions", "deletions", "insertions", "reference_words"):
+                result[field] = measure[field]
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a TTS model over a text corpus")
+    parser.add_argument("corpus", help="Plain text (one sentence per line) or JSONL corpus")
+    parser.add_argument("--model", required=True, help="TTS model id")
+    parser.add_argument("--speaker", default=None, help="Speaker for multi-speaker models")
+    parser.add_argument("--output", default="evaluation_results.jsonl", help="Results file (JSONL, appended)")
+    parser.add_argument("--summary", default=None, help="Aggregate statistics file (default: <output>.summary.json)")
+    parser.add_argument("--text-field", default="text", help="Text field for JSONL corpora")
+    parser.add_argument("--id-field", default="id", help="Id field for JSONL corpora")
+    parser.add_argument("--tts-workers", type=int, default=None, help="Concurrent TTS requests")
+    parser.add_argument("--asr-batch-size", type=int, default=8, help="Samples per ASR batch")
+    parser.add_argument("--queue-size", type=int, default=32, help="Bound on samples buffered between stages")
+    parser.add_argument("--audio-dir", default=None, help="Where to write synthesized audio with --keep-audio")
+    parser.add_argument("--keep-audio", action="store_true", help="Also write synthesized audio as WAV files")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get('WER_THRESHOLD', '0.3')))
+    args = parser.parse_args(argv)
+
+    samples = load_corpus(args.corpus, args.text_field, args.id_field)
+    completed = load_completed(args.output)
+    pending = [(sample_id, text) for sample_id, text in samples if sample_id not in completed]
+    print(f"{len(samples)} samples in corpus, {len(completed)} already evaluated, {len(pending)} to go")
+
+    evaluator = CorpusEvaluator(
+        args.model,
+        speaker=args.speaker,
+        tts_workers=args.tts_workers,
+        asr_batch_size=args.asr_batch_size,
+        queue_size=args.queue_size,
+        audio_dir=args.audio_dir,
+        keep_audio=args.keep_audio,
+        threshold=args.threshold,
+    )
+    if pending:
+        evaluator.run(pending, args.output)
+
+    summary = summarize(args.output, args.threshold)
+    summary.update({"model_id": args.model, "speaker": args.speaker, "corpus": args.corpus})
+    summary_path = args.summary or f"{args.output}.summary.json"
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -1,42 +1,213 @@
 import os
 import csv
+import time
 import logging
+import threading
 from datetime import datetime
-import sys
-import glob
-
-# Setup environment for nix packages  
-nix_packages = []
-try:
-    import subprocess
-    result = subprocess.run(['ls', '/nix/store'], capture_output=True, text=True)
-    store_dirs = result.stdout.strip().split('\n')
-    
-    for pkg_name in ['torch', 'numpy', 'scipy']:
-        matching_dirs = [d for d in store_dirs if f'python311-{pkg_name}' in d]
-        if matching_dirs:
-            pkg_path = f"/nix/store/{matching_dirs[0]}/lib/python3.11/site-packages"
-            if os.path.exists(pkg_path) and pkg_path not in sys.path:
-                sys.path.insert(0, pkg_path)
-                nix_packages.append(pkg_name)
-except Exception:
-    pass
 
 logger = logging.getLogger(__name__)
 
-try:
-    import jiwer
-    JIWER_AVAILABLE = True
-except ImportError:
-    JIWER_AVAILABLE = False
-    jiwer = None
+import numpy as np
+
+# Pairs scored together in one vectorized DP pass by measure_batch
+BATCH_CHUNK_SIZE = 256
+
+# Fixed-bin WER sketch: 0.01-wide bins over [0, 2) plus one overflow bin
+SKETCH_BIN_WIDTH = 0.01
+SKETCH_BINS = 200
+
+
+def _encode(tokens, vocab):
+    """Map tokens to integer ids so comparisons run on numpy arrays"""
+    return np.array([vocab.setdefault(token, len(vocab)) for token in tokens], dtype=np.int64)
+
+
+def _distance_matrix(ref_ids, hyp_ids):
+    """Levenshtein DP table between two id sequences, one vectorized row at a time
+
+    The in-row insertion dependency D[i][j-1] + 1 is resolved with a running
+    minimum: D[i][j] = j + min_{k<=j}(t[k] - k), where t holds the best of the
+    deletion and substitution moves from the previous row.
+    """
+    n, m = len(ref_ids), len(hyp_ids)
+    cols = np.arange(m + 1)
+    table = np.empty((n + 1, m + 1), dtype=np.int32)
+    table[0] = cols
+    for i in range(1, n + 1):
+        t = np.empty(m + 1, dtype=np.int32)
+        t[0] = i
+        t[1:] = np.minimum(table[i - 1, 1:] + 1, table[i - 1, :-1] + (hyp_ids != ref_ids[i - 1]))
+        table[i] = np.minimum.accumulate(t - cols) + cols
+    return table
+
+
+def _batch_distance_tables(ref_ids, hyp_ids):
+    """DP tables for a padded batch: ref_ids (B, N) and hyp_ids (B, M)
+
+    Padding never matches and only extends rows/columns past each pair's own
+    lengths, so table[b, n_b, m_b] is exactly that pair's edit distance.
+    """
+    batch, n = ref_ids.shape
+    m = hyp_ids.shape[1]
+    cols = np.arange(m + 1)
+    tables = np.empty((batch, n + 1, m + 1), dtype=np.int32)
+    tables[:, 0, :] = cols
+    t = np.empty((batch, m + 1), dtype=np.int32)
+    for i in range(1, n + 1):
+        previous = tables[:, i - 1, :]
+        t[:, 0] = i
+        t[:, 1:] = np.minimum(previous[:, 1:] + 1, previous[:, :-1] + (hyp_ids != ref_ids[:, i - 1:i]))
+        tables[:, i, :] = np.minimum.accumulate(t - cols, axis=1) + cols
+    return tables
+
+
+def _batch_final_distances(ref_ids, hyp_ids, ref_lengths, hyp_lengths):
+    """Edit distances only, for a padded batch, keeping two DP rows at a time
+
+    Used when no backtrace is needed (character error rates), so memory is
+    O(batch * m) instead of O(batch * n * m). Each pair's distance is read
+    from the row that matches its own reference length.
+    """
+    batch, n = ref_ids.shape
+    m = hyp_ids.shape[1]
+    cols = np.arange(m + 1)
+    rows = np.arange(batch)
+    previous = np.tile(cols, (batch, 1)).astype(np.int32)
+    distances = np.zeros(batch, dtype=np.int64)
+    finished = ref_lengths == 0
+    distances[finished] = previous[rows[finished], hyp_lengths[finished]]
+    t = np.empty((batch, m + 1), dtype=np.int32)
+    for i in range(1, n + 1):
+        t[:, 0] = i
+        t[:, 1:] = np.minimum(previous[:, 1:] + 1, previous[:, :-1] + (hyp_ids != ref_ids[:, i - 1:i]))
+        previous = np.minimum.accumulate(t - cols, axis=1) + cols
+        finished = ref_lengths == i
+        distances[finished] = previous[rows[finished], hyp_lengths[finished]]
+    return distances
+
+
+def _backtrace(table, ref_tokens, hyp_tokens, n, m, with_alignment):
+    """Walk a DP table back from (n, m) counting hits/substitutions/deletions/insertions"""
+    counts = {"hits": 0, "substitutions": 0, "deletions": 0, "insertions": 0}
+    alignment = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0:
+            same = ref_tokens[i - 1] == hyp_tokens[j - 1]
+            if table[i, j] == table[i - 1, j - 1] + (0 if same else 1):
+                op = "equal" if same else "substitute"
+                counts["hits" if same else "substitutions"] += 1
+                if with_alignment:
+                    alignment.append((op, ref_tokens[i - 1], hyp_tokens[j - 1]))
+                i, j = i - 1, j - 1
+                continue
+        if i > 0 and table[i, j] == table[i - 1, j] + 1:
+            counts["deletions"] += 1
+            if with_alignment:
+                alignment.append(("delete", ref_tokens[i - 1], None))
+            i -= 1
+        else:
+            counts["insertions"] += 1
+            if with_alignment:
+                alignment.append(("insert", None, hyp_tokens[j - 1]))
+            j -= 1
+    if with_alignment:
+        alignment.reverse()
+        counts["alignment"] = alignment
+    return counts
+
+
+def _error_rate(errors, reference_length, hypothesis_length):
+    if reference_length == 0:
+        return 0.0 if hypothesis_length == 0 else 1.0
+    return errors / reference_length
+
+
+def _normalize(text):
+    return (text or "").strip().lower()
+
+
+class QualitySketch:
+    """Streaming WER aggregate: count, sum, threshold exceedances and a fixed-bin histogram
+
+    add() is O(1); percentiles are read off the cumulative bin counts and
+    are accurate to one bin width. Sketches with the same bins merge by
+    adding counts.
+    """
+
+    __slots__ = ("count", "total", "exceeded", "maximum", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.exceeded = 0
+        self.maximum = 0.0
+        self.bins = [0] * (SKETCH_BINS + 1)
+
+    def add(self, wer, exceeded=False):
+        self.count += 1
+        self.total += wer
+        self.exceeded += bool(exceeded)
+        self.maximum = max(self.maximum, wer)
+        self.bins[min(int(wer / SKETCH_BIN_WIDTH), SKETCH_BINS)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.exceeded += other.exceeded
+        self.maximum = max(self.maximum, other.maximum)
+        self.bins = [a + b for a, b in zip(self.bins, other.bins)]
+        return self
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100), interpolated within its bin"""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.bins):
+            if count and seen + count >= rank:
+                if index == SKETCH_BINS:
+                    return self.maximum
+                low = index * SKETCH_BIN_WIDTH
+                value = low + SKETCH_BIN_WIDTH * (rank - seen) / count
+                return min(value, self.maximum)
+            seen += count
+        return self.maximum
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_wer": self.total / self.count if self.count else None,
+            "p50_wer": self.percentile(50),
+            "p90_wer": self.percentile(90),
+            "p99_wer": self.percentile(99),
+            "max_wer": self.maximum if self.count else None,
+            "threshold_exceeded_rate": self.exceeded / self.count if self.count else None,
+        }
+
 
 class WERCalculator:
     """Word Error Rate calculator and logger"""
     
     def __init__(self):
         self.csv_path = os.path.join(os.getcwd(), 'poor_quality_samples.csv')
-        self._ensure_csv_exists()
+        self.sample_sink = None
+        # Rolling per model/speaker/time bucket aggregates of every scored sample
+        self.bucket_seconds = int(os.environ.get('QUALITY_BUCKET_SECONDS', '3600'))
+        self.retention_buckets = int(os.environ.get('QUALITY_RETENTION_BUCKETS', '24'))
+        self._aggregates = {}  # (model_id, speaker, bucket_start) -> QualitySketch
+        self._newest_bucket = None
+        self._aggregates_lock = threading.Lock()
+    
+    def set_sample_sink(self, sink):
+        """Send poor quality samples to sink(row) instead of the CSV file
+        
+        The web app uses this to route samples into the database through a
+        buffered writer; standalone tools keep writing the CSV, which is only
+        created when the first sample is written to it.
+        """
+        self.sample_sink = sink
     
     def _ensure_csv_exists(self):
         """Ensure CSV file exists with proper headers"""
@@ -59,34 +230,171 @@ class WERCalculator:
             reference = reference.strip().lower()
             hypothesis = hypothesis.strip().lower()
             
-            if JIWER_AVAILABLE:
-                # Calculate WER using jiwer
-                wer = jiwer.wer(reference, hypothesis)
-            else:
-                # Simple word difference calculation when jiwer is not available
-                ref_words = reference.split()
-                hyp_words = hypothesis.split()
-                
-                if len(ref_words) == 0:
-                    wer = 1.0 if len(hyp_words) > 0 else 0.0
-                else:
-                    # Count matching words (simple approximation)
-                    matches = sum(1 for word in hyp_words if word in ref_words)
-                    wer = 1.0 - (matches / len(ref_words))
-                    wer = max(0.0, min(1.0, wer))  # Clamp between 0 and 1
+            wer = self.measure(reference, hypothesis)["wer"]
             
-            logger.debug(f"WER calculation - Reference: '{reference}', Hypothesis: '{hypothesis}', WER: {wer}")
+            logger.debug(f"WER calculation - WER: {wer}")
             return wer
             
         except Exception as e:
             logger.error(f"WER calculation failed: {str(e)}")
             return 1.0  # Return maximum error on failure
     
+    def measure(self, reference, hypothesis, return_alignment=False):
+        """Word and character error rates with edit operation counts
+        
+        Returns wer, cer, hits, substitutions, deletions, insertions and the
+        reference/hypothesis word counts; with return_alignment=True also the
+        word alignment as (op, reference_word, hypothesis_word) tuples.
+        """
+        reference = _normalize(reference)
+        hypothesis = _normalize(hypothesis)
+        ref_words, hyp_words = reference.split(), hypothesis.split()
+        
+        vocab = {}
+        table = _distance_matrix(_encode(ref_words, vocab), _encode(hyp_words, vocab))
+        result = _backtrace(table, ref_words, hyp_words, len(ref_words), len(hyp_words), return_alignment)
+        
+        char_errors = self._batch_distances([reference], [hypothesis])[0]
+        
+        errors = result["substitutions"] + result["deletions"] + result["insertions"]
+        result.update({
+            "wer": _error_rate(errors, len(ref_words), len(hyp_words)),
+            "cer": _error_rate(char_errors, len(reference), len(hypothesis)),
+            "reference_words": len(ref_words),
+            "hypothesis_words": len(hyp_words),
+        })
+        return result
+    
+    def measure_batch(self, references, hypotheses, return_alignment=False):
+        """Score many reference/hypothesis pairs with vectorized DP
+        
+        Pairs are sorted by length and scored in padded chunks, one numpy pass
+        per chunk instead of one Python-level DP per pair. Returns one result
+        per pair, in input order, shaped like measure().
+        """
+        if len(references) != len(hypotheses):
+            raise ValueError("references and hypotheses must have the same length")
+        
+        references = [_normalize(text) for text in references]
+        hypotheses = [_normalize(text) for text in hypotheses]
+        ref_words = [text.split() for text in references]
+        hyp_words = [text.split() for text in hypotheses]
+        
+        results = [None] * len(references)
+        word_errors = self._batch_distances(ref_words, hyp_words, results, return_alignment)
+        char_errors = self._batch_distances(references, hypotheses)
+        
+        for index, result in enumerate(results):
+            result.update({
+                "wer": _error_rate(word_errors[index], len(ref_words[index]), len(hyp_words[index])),
+                "cer": _error_rate(char_errors[index], len(references[index]), len(hypotheses[index])),
+                "reference_words": len(ref_words[index]),
+                "hypothesis_words": len(hyp_words[index]),
+            })
+        return results
+    
+    def _batch_distances(self, refs, hyps, results=None, return_alignment=False):
+        """Edit distances for token sequence pairs; fills results with op counts if given"""
+        vocab = {}
+        ref_ids = [_encode(tokens, vocab) for tokens in refs]
+        hyp_ids = [_encode(tokens, vocab) for tokens in hyps]
+        distances = [0] * len(refs)
+        
+        order = sorted(range(len(refs)), key=lambda k: (len(refs[k]), len(hyps[k])))
+        for start in range(0, len(order), BATCH_CHUNK_SIZE):
+            chunk = order[start:start + BATCH_CHUNK_SIZE]
+            n = max(len(refs[k]) for k in chunk)
+            m = max(len(hyps[k]) for k in chunk)
+            # Distinct negative pads so padding never counts as a match
+            padded_refs = np.full((len(chunk), n), -1, dtype=np.int64)
+            padded_hyps = np.full((len(chunk), m), -2, dtype=np.int64)
+            for row, k in enumerate(chunk):
+                padded_refs[row, :len(ref_ids[k])] = ref_ids[k]
+                padded_hyps[row, :len(hyp_ids[k])] = hyp_ids[k]
+            
+            if results is None:
+                # Distances only: no full tables needed
+                finals = _batch_final_distances(
+                    padded_refs, padded_hyps,
+                    np.array([len(refs[k]) for k in chunk]), np.array([len(hyps[k]) for k in chunk])
+                )
+                for row, k in enumerate(chunk):
+                    distances[k] = int(finals[row])
+                continue
+            
+            tables = _batch_distance_tables(padded_refs, padded_hyps)
+            for row, k in enumerate(chunk):
+                distances[k] = int(tables[row, len(refs[k]), len(hyps[k])])
+                results[k] = _backtrace(tables[row], refs[k], hyps[k], len(refs[k]), len(hyps[k]), return_alignment)
+        return distances
+    
+    def record_score(self, wer_score, model_name, speaker=None, threshold_exceeded=False, timestamp=None):
+        """Add a scored sample to the rolling aggregates for its model, speaker and time bucket"""
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        key = (model_name, speaker or 'default', bucket)
+        with self._aggregates_lock:
+            sketch = self._aggregates.get(key)
+            if sketch is None:
+                sketch = self._aggregates[key] = QualitySketch()
+                if self._newest_bucket is None or bucket > self._newest_bucket:
+                    self._newest_bucket = bucket
+                    self._expire_buckets()
+            sketch.add(wer_score, threshold_exceeded)
+    
+    def _expire_buckets(self):
+        """Drop buckets outside the retention window; runs once per new bucket"""
+        oldest = self._newest_bucket - (self.retention_buckets - 1) * self.bucket_seconds
+        for key in [key for key in self._aggregates if key[2] < oldest]:
+            del self._aggregates[key]
+    
+    def quality_summary(self, model_name=None, speaker=None, since=None, include_buckets=False):
+        """Aggregated WER statistics per model and speaker over the retained buckets
+        
+        since (epoch seconds) limits the summary to buckets that end after it.
+        Aggregates live in this process, so each web worker reports its own.
+        """
+        with self._aggregates_lock:
+            selected = [
+                (key, sketch) for key, sketch in self._aggregates.items()
+                if (model_name is None or key[0] == model_name)
+                and (speaker is None or key[1] == speaker)
+                and (since is None or key[2] + self.bucket_seconds > since)
+            ]
+            groups = {}
+            for (model_id, speaker_name, bucket), sketch in sorted(selected, key=lambda item: item[0]):
+                group = groups.setdefault((model_id, speaker_name), {"total": QualitySketch(), "buckets": []})
+                group["total"].merge(sketch)
+                if include_buckets:
+                    group["buckets"].append(dict(sketch.summary(), bucket_start=bucket))
+        
+        summary = []
+        for (model_id, speaker_name), group in groups.items():
+            entry = {"model_id": model_id, "speaker": speaker_name}
+            entry.update(group["total"].summary())
+            if include_buckets:
+                entry["buckets"] = group["buckets"]
+            summary.append(entry)
+        return summary
+    
     def log_poor_quality(self, input_text, transcribed_text, wer_score, model_name, speaker=None):
-        """Log poor quality samples to CSV"""
+        """Log poor quality samples to the sample sink, or CSV when none is set"""
         try:
+            if self.sample_sink is not None:
+                self.sample_sink({
+                    "input_text": input_text,
+                    "transcribed_text": transcribed_text,
+                    "wer_score": wer_score,
+                    "model_id": model_name,
+                    "speaker": speaker or 'default',
+                    "timestamp": datetime.utcnow(),
+                })
+                logger.info(f"Queued poor quality sample - WER: {wer_score}, Model: {model_name}")
+                return
+            
             timestamp = datetime.now().isoformat()
             
+            self._ensure_csv_exists()
             with open(self.csv_path, 'a', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow([
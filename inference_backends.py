@@ -0,0 +1,276 @@
+"""Alternative CPU inference backends for the VITS (MMS/UGTTS) models.
+
+A transformers model entry in TTSService.available_models may carry a
+"backend" key (default: TTS_BACKEND, itself defaulting to "eager"):
+
+    eager    fp32 PyTorch, as loaded
+    int8     dynamic int8 quantization of the Linear layers
+    compile  torch.compile with dynamic shapes
+    onnx     ONNX Runtime on a graph exported once and cached on disk
+
+Check a backend against fp32 before enabling it:
+
+    python inference_backends.py --model facebook_mms-tts-aka --backend int8
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import importlib.util
+from types import SimpleNamespace
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("eager", "int8", "compile", "onnx")
+
+# Imported when the first ONNX session is created
+try:
+    ONNXRUNTIME_AVAILABLE = importlib.util.find_spec("onnxruntime") is not None
+except (ImportError, ValueError):
+    ONNXRUNTIME_AVAILABLE = False
+
+
+def default_backend():
+    return os.environ.get('TTS_BACKEND', 'eager')
+
+
+def apply_backend(model, backend, cache_key=None, cache_dir=None, threads=None):
+    """Return model prepared for the given backend
+
+    The result is called like a VitsModel (input_ids, attention_mask,
+    speaker_id) and returns an object with waveform and sequence_lengths.
+    """
+    import torch
+
+    if backend == "eager":
+        return model
+    if backend == "int8":
+        # VITS attention and projection layers are Linear; the convolutional
+        # flow and decoder stay in fp32
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "compile":
+        return torch.compile(model, dynamic=True)
+    if backend == "onnx":
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ValueError("onnxruntime not available for the onnx backend")
+        return OnnxVitsModel(model, cache_key or model.config.name_or_path, cache_dir, threads=threads)
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def _export_module(model, speaker_id):
+    """Wrap a VitsModel for tracing with a fixed speaker and tuple outputs"""
+    import torch
+
+    class ExportWrapper(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            output = self.model(input_ids=input_ids, attention_mask=attention_mask, speaker_id=speaker_id)
+            return output.waveform, output.sequence_lengths
+
+    return ExportWrapper()
+
+
+class OnnxVitsModel:
+    """VitsModel stand-in that runs an exported ONNX graph with ONNX Runtime
+
+    One graph is exported per speaker id (the HF forward takes it as a Python
+    int) and cached under ONNX_CACHE_DIR, keyed by model and torch version.
+    With deterministic=True the graph is exported without sampling noise.
+    """
+
+    def __init__(self, model, cache_key, cache_dir=None, deterministic=False, threads=None):
+        self.model = model
+        self.config = model.config
+        self.device = "cpu"
+        self.cache_key = cache_key
+        self.cache_dir = cache_dir or os.environ.get(
+            'ONNX_CACHE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'kasa_mframa', 'onnx')
+        )
+        self.deterministic = deterministic
+        if threads is None:
+            threads = int(os.environ.get('ONNX_THREADS', '0'))
+        self.threads = threads  # 0 lets ONNX Runtime decide
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, speaker_id):
+        import torch
+
+        digest = hashlib.sha256(
+            f"{self.cache_key}|{getattr(self.config, '_commit_hash', '')}|{torch.__version__}".encode()
+        ).hexdigest()[:16]
+        variant = "det" if self.deterministic else "sampled"
+        speaker = "default" if speaker_id is None else str(speaker_id)
+        return os.path.join(self.cache_dir, f"{digest}-{speaker}-{variant}.onnx")
+
+    def _session(self, speaker_id):
+        import onnxruntime
+
+        with self._lock:
+            session = self._sessions.get(speaker_id)
+            if session is None:
+                path = self.path_for(speaker_id)
+                if not os.path.exists(path):
+                    self._export(speaker_id, path)
+                options = onnxruntime.SessionOptions()
+                if self.threads:
+                    options.intra_op_num_threads = self.threads
+                session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+                self._sessions[speaker_id] = session
+            return session
+
+    def _export(self, speaker_id, path):
+        import torch
+
+        print(f"Exporting ONNX graph for {self.cache_key} (speaker {speaker_id}) to {path}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        wrapper = _export_module(self.model, speaker_id)
+        saved = (self.model.noise_scale, self.model.noise_scale_duration)
+        if self.deterministic:
+            self.model.noise_scale = self.model.noise_scale_duration = 0.0
+        input_ids = torch.ones((1, 16), dtype=torch.long)
+        attention_mask = torch.ones((1, 16), dtype=torch.long)
+        scratch = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        try:
+            with torch.no_grad():
+                torch.onnx.export(
+                    wrapper, (input_ids, attention_mask), scratch,
+                    input_names=["input_ids", "attention_mask"],
+                    output_names=["waveform", "sequence_lengths"],
+                    dynamic_axes={
+                        "input_ids": {0: "batch", 1: "tokens"},
+                        "attention_mask": {0: "batch", 1: "tokens"},
+                        "waveform": {0: "batch", 1: "samples"},
+                        "sequence_lengths": {0: "batch"},
+                    },
+                    opset_version=17,
+                )
+            os.replace(scratch, path)
+        finally:
+            self.model.noise_scale, self.model.noise_scale_duration = saved
+            if os.path.exists(scratch):
+                os.remove(scratch)
+
+    def __call__(self, input_ids, attention_mask=None, speaker_id=None):
+        import torch
+
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        session = self._session(speaker_id)
+        waveform, sequence_lengths = session.run(None, {
+            "input_ids": input_ids.cpu().numpy().astype(np.int64),
+            "attention_mask": attention_mask.cpu().numpy().astype(np.int64),
+        })
+        return SimpleNamespace(
+            waveform=torch.from_numpy(waveform),
+            sequence_lengths=torch.from_numpy(sequence_lengths),
+        )
+
+
+def parity_check(tts_service, model_id, backend, texts, speaker=None):
+    """Compare a backend's waveforms with fp32 eager output on the same texts
+
+    Sampling noise is disabled on both sides so the outputs are comparable.
+    Reports max and RMS deviation, length mismatches and per-utterance time.
+    """
+    import torch
+
+    model_info = tts_service.available_models[model_id]
+    reference_model = tts_service._load_model(model_id)
+    tokenizer = reference_model.tokenizer
+    eager = reference_model.model
+    speaker_id = model_info["speakers"].index(speaker) if speaker else None
+
+    saved = (eager.noise_scale, eager.noise_scale_duration)
+    eager.noise_scale = eager.noise_scale_duration = 0.0
+    try:
+        if backend == "onnx":
+            candidate = OnnxVitsModel(eager, model_info.get("hf_id", model_id), deterministic=True)
+        else:
+            candidate = apply_backend(eager, backend)
+
+        def run(model, text):
+            inputs = tokenizer(text, return_tensors="pt")
+            started = time.perf_counter()
+            with torch.no_grad():
+                output = model(**inputs, speaker_id=speaker_id)
+            elapsed = time.perf_counter() - started
+            length = int(output.sequence_lengths[0])
+            return output.waveform[0, :length].cpu().numpy(), elapsed
+
+        # Warm both paths (compilation, ONNX export/session creation)
+        run(eager, texts[0])
+        run(candidate, texts[0])
+
+        rows = []
+        for text in texts:
+            reference, reference_time = run(eager, text)
+            output, candidate_time = run(candidate, text)
+            length = min(len(reference), len(output))
+            deviation = np.abs(reference[:length] - output[:length]) if length else np.zeros(1)
+            rows.append({
+                "text_length": len(text),
+                "max_abs_deviation": float(deviation.max()),
+                "rms_deviation": float(np.sqrt(np.mean(deviation ** 2))),
+                "length_difference": len(output) - len(reference),
+                "fp32_seconds": reference_time,
+                "backend_seconds": candidate_time,
+            })
+    finally:
+        eager.noise_scale, eager.noise_scale_duration = saved
+
+    fp32_total = sum(row["fp32_seconds"] for row in rows)
+    backend_total = sum(row["backend_seconds"] for row in rows)
+    return {
+        "model_id": model_id,
+        "backend": backend,
+        "utterances": len(rows),
+        "max_abs_deviation": max(row["max_abs_deviation"] for row in rows),
+        "max_length_difference": max(abs(row["length_difference"]) for row in rows),
+        "fp32_seconds_per_utterance": fp32_total / len(rows),
+        "backend_seconds_per_utterance": backend_total / len(rows),
+        "speedup": fp32_total / backend_total if backend_total else None,
+        "rows": rows,
+    }
+
+
+def main(argv=None):
+    from tts_service import TTSService
+
+    parser = argparse.ArgumentParser(description="Check an inference backend against fp32 output")
+    parser.add_argument("--model", required=True, help="Transformers TTS model id")
+    parser.add_argument("--backend", required=True, choices=[b for b in BACKENDS if b != "eager"])
+    parser.add_argument("--speaker", default=None)
+    parser.add_argument("--text", action="append", help="Input text (repeatable)")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    texts = args.text or [
+        "Akwaaba.",
+        "Me din de Kofi na mefiri Kumasi.",
+        "Ɛnnɛ yɛbɛkɔ sukuu na yɛasua nneɛma foforɔ bebree wɔ hɔ ansa na yɛasan aba fie.",
+    ]
+    tts_service = TTSService()
+    # The reference is always plain fp32
+    tts_service.available_models[args.model]["backend"] = "eager"
+    report = parity_check(tts_service, args.model, args.backend, texts, args.speaker)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "rows"}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
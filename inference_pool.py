@@ -0,0 +1,265 @@
+"""Out-of-process inference pool.
+
+The pool process owns the TTS and ASR models so Flask workers don't each
+load their own copy. Start it with:
+
+    INFERENCE_AUTHKEY=... INFERENCE_TTS_THREADS=8 INFERENCE_TORCH_THREADS=4 python inference_pool.py
+
+and point the web app at it with INFERENCE_SOCKET (the same path the pool
+listens on) and the same INFERENCE_AUTHKEY. Web workers then submit jobs
+over the Unix socket and wait for results, so HTTP concurrency scales
+independently of inference.
+
+TTS and ASR jobs run on separate thread pools inside the one process: a
+long Whisper evaluation never queues in front of a synthesis request, and
+concurrent synthesis requests reach the TTS micro-batcher together so they
+can share a forward pass.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Listener, Client
+
+from tts_service import TTSService
+from asr_service import ASRService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'kasa_mframa_inference.sock')
+
+# Methods web workers may invoke on the pool's services
+ALLOWED_METHODS = {
+    "tts": {"synthesize", "synthesize_audio", "synthesize_audio_batch", "get_model_status", "get_batching_stats"},
+    "asr": {"transcribe", "transcribe_batch"},
+    "pool": {"ping"},
+}
+
+
+def _authkey():
+    """Shared secret for the socket; payloads are pickled, so there is no default"""
+    authkey = os.environ.get('INFERENCE_AUTHKEY')
+    if not authkey:
+        raise RuntimeError("INFERENCE_AUTHKEY must be set to use the inference pool")
+    return authkey.encode('utf-8')
+
+
+def _set_torch_threads(torch_threads):
+    if torch_threads:
+        os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+        os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+
+class InferencePool:
+    """Serves inference jobs from the models loaded in this process"""
+
+    def __init__(self, address=None, tts_threads=None, asr_threads=None, torch_threads=None):
+        self.address = address or os.environ.get('INFERENCE_SOCKET', DEFAULT_SOCKET)
+        if tts_threads is None:
+            tts_threads = int(os.environ.get('INFERENCE_TTS_THREADS', '8'))
+        if asr_threads is None:
+            asr_threads = int(os.environ.get('INFERENCE_ASR_THREADS', '1'))
+        if torch_threads is None:
+            torch_threads = int(os.environ.get('INFERENCE_TORCH_THREADS', '0'))
+        self.tts_threads = tts_threads
+        self.asr_threads = asr_threads
+        self.torch_threads = torch_threads
+        self.services = {}
+        self.executors = {}
+
+    def serve_forever(self):
+        """Load the services and accept client connections"""
+        authkey = _authkey()
+        _set_torch_threads(self.torch_threads)
+        self.services = {
+            "tts": TTSService(),
+            "asr": ASRService(),
+            "pool": self,
+        }
+        self.services["tts"].preload()
+        # One queue per service, so ASR jobs never wait behind TTS or vice versa
+        self.executors = {
+            "tts": ThreadPoolExecutor(max_workers=self.tts_threads, thread_name_prefix="pool-tts"),
+            "asr": ThreadPoolExecutor(max_workers=self.asr_threads, thread_name_prefix="pool-asr"),
+        }
+
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+        with Listener(self.address, family='AF_UNIX', authkey=authkey) as listener:
+            print(f"Inference pool listening on {self.address} "
+                  f"({self.tts_threads} TTS threads, {self.asr_threads} ASR threads)")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.error(f"Failed to accept inference client: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def ping(self):
+        """Pool liveness; ready once preloading finished, with each preloaded model's outcome"""
+        tts_service = self.services["tts"]
+        return {"ready": tts_service.preload_complete.is_set(), "preload": tts_service.preload_status()}
+
+    def _run(self, service, method, args, kwargs):
+        call = getattr(self.services[service], method)
+        executor = self.executors.get(service)
+        if executor is None:
+            return call(*args, **kwargs)
+        return executor.submit(call, *args, **kwargs).result()
+
+    def _handle(self, conn):
+        """Serve requests from one client connection until it closes"""
+        with conn:
+            while True:
+                try:
+                    service, method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    if method not in ALLOWED_METHODS.get(service, ()):
+                        raise ValueError(f"Method not allowed: {service}.{method}")
+                    result = self._run(service, method, args, kwargs)
+                    conn.send(("ok", result))
+                except Exception as e:
+                    logger.error(f"Inference job {service}.{method} failed: {str(e)}")
+                    conn.send(("error", str(e)))
+
+
+class InferenceClient:
+    """Submits jobs to an InferencePool; one connection per calling thread"""
+
+    def __init__(self, address=None):
+        self.address = address or os.environ.get('INFERENCE_SOCKET', DEFAULT_SOCKET)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family='AF_UNIX', authkey=_authkey())
+            self._local.conn = conn
+        return conn
+
+    def call(self, service, method, *args, **kwargs):
+        """Run service.method in the pool and wait for its result"""
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((service, method, args, kwargs))
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Pool restarted or connection dropped; reconnect once
+                self._local.conn = None
+                if attempt:
+                    raise
+
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+
+class RemoteTTSService(TTSService):
+    """TTSService whose inference runs in the inference pool
+
+    Model metadata (available models, speakers) is answered locally; only
+    synthesis goes over the socket.
+    """
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def preload(self, model_ids=None, background=True):
+        """Models are preloaded by the pool; wait until it answers and reports ready"""
+        def run():
+            while True:
+                try:
+                    if self.client.call("pool", "ping")["ready"]:
+                        self.preload_complete.set()
+                        return
+                except Exception as e:
+                    logger.warning(f"Inference pool not reachable yet: {str(e)}")
+                time.sleep(1.0)
+
+        if background:
+            threading.Thread(target=run, name="pool-ready", daemon=True).start()
+        else:
+            run()
+
+    def ping(self):
+        """True if the pool answers and has its models loaded"""
+        try:
+            return bool(self.client.call("pool", "ping")["ready"])
+        except Exception:
+            return False
+
+    def preload_status(self):
+        """Preload outcome per model as reported by the pool; empty while it is unreachable"""
+        try:
+            return self.client.call("pool", "ping")["preload"]
+        except Exception:
+            return {}
+
+    def synthesize(self, text, model_id, output_path, speaker=None):
+        try:
+            return self.client.call("tts", "synthesize", text, model_id, output_path, speaker)
+        except Exception as e:
+            print(f"Remote synthesis failed: {str(e)}")
+            return False
+
+    def synthesize_audio(self, text, model_id, speaker=None):
+        try:
+            return self.client.call("tts", "synthesize_audio", text, model_id, speaker)
+        except Exception as e:
+            print(f"Remote synthesis failed: {str(e)}")
+            return None
+
+    def synthesize_audio_batch(self, items, model_id):
+        try:
+            return self.client.call("tts", "synthesize_audio_batch", items, model_id)
+        except Exception as e:
+            print(f"Remote synthesis failed: {str(e)}")
+            return None
+
+    def get_model_status(self):
+        return self.client.call("tts", "get_model_status")
+
+    def get_batching_stats(self):
+        return self.client.call("tts", "get_batching_stats")
+
+
+class RemoteASRService(ASRService):
+    """ASRService whose transcription runs in the inference pool"""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def transcribe(self, audio):
+        try:
+            return self.client.call("asr", "transcribe", audio)
+        except Exception as e:
+            print(f"Remote transcription failed: {str(e)}")
+            return None
+
+    def transcribe_batch(self, audios):
+        try:
+            return self.client.call("asr", "transcribe_batch", audios)
+        except Exception as e:
+            print(f"Remote batch transcription failed: {str(e)}")
+            return [None] * len(audios)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    InferencePool().serve_forever()
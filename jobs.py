@@ -0,0 +1,130 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when JOB_MAX_PENDING jobs are already waiting"""
+
+
+class JobQueue:
+    """Runs background jobs on a small thread pool and keeps their results for polling
+
+    At most max_pending jobs wait to start; queued jobs hold their arguments
+    (e.g. whole waveforms), so beyond that submit() raises QueueFull and the
+    caller decides what to skip.
+    """
+
+    def __init__(self, max_workers=None, max_jobs=None, max_pending=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get('JOB_WORKERS', '1'))
+        if max_jobs is None:
+            max_jobs = int(os.environ.get('JOB_RETENTION', '10000'))
+        if max_pending is None:
+            max_pending = int(os.environ.get('JOB_MAX_PENDING', '64'))
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()  # job_id -> job record, oldest first
+        self._keys = {}  # dedup key -> job_id
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, key=None, **kwargs):
+        """Queue fn(*args, **kwargs) and return the job record
+
+        Jobs submitted with a key are deduplicated: while an earlier job with
+        the same key is pending or has succeeded, that job is returned instead.
+        """
+        with self._lock:
+            if key is not None and key in self._keys:
+                existing = self._jobs.get(self._keys[key])
+                if existing is not None and existing["status"] != "failed":
+                    return dict(existing, deduplicated=True)
+
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self.pending} jobs already waiting")
+            self.pending += 1
+
+            job_id = str(uuid.uuid4())
+            job = {
+                "id": job_id,
+                "type": kind,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            if key is not None:
+                self._keys[key] = job_id
+                job["key"] = key
+            self._prune()
+
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return dict(job, deduplicated=False)
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            self.pending -= 1
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                job["result"] = result
+                job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['type']}) failed: {str(e)}")
+            with self._lock:
+                job["error"] = str(e)
+                job["status"] = "failed"
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention limit; caller holds the lock"""
+        while len(self._jobs) > self.max_jobs:
+            job_id = next((j for j, job in self._jobs.items() if job["status"] in ("completed", "failed")), None)
+            if job_id is None:
+                break
+            job = self._jobs.pop(job_id)
+            if "key" in job and self._keys.get(job["key"]) == job_id:
+                del self._keys[job["key"]]
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_by_key(self, key):
+        """Return the latest job submitted with a dedup key, or None"""
+        with self._lock:
+            job_id = self._keys.get(key)
+            job = self._jobs.get(job_id) if job_id is not None else None
+            return dict(job) if job is not None else None
+
+    def get_stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {
+                "jobs": len(self._jobs),
+                "by_status": counts,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,150 @@
+import time
+import uuid
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds in seconds; covers sub-millisecond conversions up to long ASR runs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed set of labels"""
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple("" if labels.get(name) is None else str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        """Prometheus text exposition lines for this histogram"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += values[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-1]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "kasa_stage_duration_seconds",
+    "Time spent in each synthesis/evaluation stage",
+    ("stage", "model_id", "speaker"),
+)
+REQUEST_SECONDS = Histogram(
+    "kasa_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ("endpoint", "method", "status"),
+)
+
+class _Trace:
+    __slots__ = ("id", "stages", "lock")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:16]
+        self.stages = []
+        self.lock = threading.Lock()
+
+
+# Traces that stage timings are reported to. Usually the current request's
+# trace; a micro-batch reports to the traces of every request it serves.
+_traces = contextvars.ContextVar("kasa_traces", default=())
+
+
+def start_trace():
+    """Begin collecting stage timings for the current request"""
+    trace = _Trace()
+    _traces.set((trace,))
+    return trace.id
+
+
+def end_trace():
+    """Stop collecting and return (trace_id, [(stage, seconds)]), or None"""
+    traces = _traces.get()
+    if not traces:
+        return None
+    _traces.set(())
+    trace = traces[0]
+    with trace.lock:
+        return trace.id, list(trace.stages)
+
+
+def current_traces():
+    """The traces stages are reported to here; hand them to work done on other threads"""
+    return _traces.get()
+
+
+@contextmanager
+def use_traces(traces):
+    """Report stages timed in the enclosed block to traces (from current_traces())"""
+    token = _traces.set(tuple(traces))
+    try:
+        yield
+    finally:
+        _traces.reset(token)
+
+
+def propagate(fn):
+    """Wrap fn so that, on whichever thread it runs, its stages reach the caller's traces"""
+    traces = _traces.get()
+
+    def run(*args, **kwargs):
+        with use_traces(traces):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+def observe_stage(name, seconds, model_id=None, speaker=None):
+    STAGE_SECONDS.observe(seconds, stage=name, model_id=model_id, speaker=speaker)
+    for trace in _traces.get():
+        with trace.lock:
+            trace.stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name, model_id=None, speaker=None):
+    """Time the enclosed block as one stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started, model_id, speaker)
+
+
+def server_timing(stages):
+    """Format stage timings as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages)
+
+
+def render_metrics(extra_lines=()):
+    """Full /metrics payload"""
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render() + list(extra_lines)
+    return "\n".join(lines) + "\n"
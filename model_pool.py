@@ -0,0 +1,171 @@
+import gc
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Resident set size of this process, or 0 where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def estimate_model_bytes(model):
+    """Estimate memory held by a model from its parameters and buffers
+
+    Works for torch modules and objects wrapping one (HF pipelines expose
+    .model). Returns None when the size cannot be determined.
+    """
+    module = getattr(model, "model", model)
+    if not hasattr(module, "parameters"):
+        return None
+    try:
+        total = sum(p.numel() * p.element_size() for p in module.parameters())
+        if hasattr(module, "buffers"):
+            total += sum(b.numel() * b.element_size() for b in module.buffers())
+        return total
+    except Exception:
+        return None
+
+
+class ModelPool:
+    """LRU pool of loaded models bounded by a memory budget"""
+
+    def __init__(self, memory_budget_bytes=None):
+        if memory_budget_bytes is None:
+            memory_budget_bytes = int(os.environ.get('TTS_MODEL_MEMORY_BUDGET_MB', '0')) * 1024 * 1024
+        self.memory_budget_bytes = memory_budget_bytes  # 0 means unlimited
+        self._models = OrderedDict()  # model_id -> model, least recently used first
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def _stats_for(self, model_id):
+        if model_id not in self._stats:
+            self._stats[model_id] = {
+                "state": "unloaded",
+                "bytes": 0,
+                "load_time_s": None,
+                "loaded_at": None,
+                "last_used": None,
+                "uses": 0,
+                "loads": 0,
+                "evictions": 0,
+                "error": None,
+            }
+        return self._stats[model_id]
+
+    def get(self, model_id, loader):
+        """Return a loaded model, calling loader(model_id) on a miss"""
+        with self._lock:
+            model = self._touch(model_id)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it
+        with load_lock:
+            with self._lock:
+                model = self._touch(model_id)
+                if model is not None:
+                    return model
+                self._stats_for(model_id)["state"] = "loading"
+
+            rss_before = rss_bytes()
+            started = time.perf_counter()
+            try:
+                model = loader(model_id)
+            except Exception as e:
+                with self._lock:
+                    stats = self._stats_for(model_id)
+                    stats["state"] = "failed"
+                    stats["error"] = str(e)
+                raise
+            load_time = time.perf_counter() - started
+
+            size = estimate_model_bytes(model)
+            if size is None:
+                size = max(0, rss_bytes() - rss_before)
+
+            with self._lock:
+                self._models[model_id] = model
+                stats = self._stats_for(model_id)
+                stats.update({
+                    "state": "loaded",
+                    "bytes": size,
+                    "load_time_s": load_time,
+                    "loaded_at": time.time(),
+                    "last_used": time.time(),
+                    "error": None,
+                })
+                stats["uses"] += 1
+                stats["loads"] += 1
+                evicted = self._evict(keep=model_id)
+
+            if evicted:
+                gc.collect()
+            logger.info(f"Loaded model {model_id} in {load_time:.2f}s (~{size / 1e6:.0f} MB)")
+            return model
+
+    def _touch(self, model_id):
+        """Mark a resident model as most recently used; caller holds the lock"""
+        model = self._models.get(model_id)
+        if model is not None:
+            self._models.move_to_end(model_id)
+            stats = self._stats_for(model_id)
+            stats["uses"] += 1
+            stats["last_used"] = time.time()
+        return model
+
+    def resident_bytes(self):
+        return sum(self._stats[model_id]["bytes"] for model_id in self._models)
+
+    def _evict(self, keep=None):
+        """Evict least recently used models until under budget; caller holds the lock"""
+        evicted = []
+        if not self.memory_budget_bytes:
+            return evicted
+        while self.resident_bytes() > self.memory_budget_bytes:
+            model_id = next((m for m in self._models if m != keep), None)
+            if model_id is None:
+                break
+            del self._models[model_id]
+            stats = self._stats_for(model_id)
+            stats["state"] = "evicted"
+            stats["evictions"] += 1
+            evicted.append(model_id)
+            logger.info(f"Evicted model {model_id} to stay within memory budget")
+        return evicted
+
+    def evict(self, model_id):
+        """Drop a model from the pool; in-flight users keep their reference"""
+        with self._lock:
+            if self._models.pop(model_id, None) is None:
+                return False
+            stats = self._stats_for(model_id)
+            stats["state"] = "evicted"
+            stats["evictions"] += 1
+        gc.collect()
+        return True
+
+    def is_loaded(self, model_id):
+        with self._lock:
+            return model_id in self._models
+
+    def get_status(self):
+        """Return per-model load time, residency and usage"""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "resident_bytes": self.resident_bytes(),
+                "process_rss_bytes": rss_bytes(),
+                "resident": list(self._models),
+                "models": {model_id: dict(stats) for model_id, stats in self._stats.items()},
+            }
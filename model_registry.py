@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import tomllib
+
+from inference_backends import BACKENDS
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPES = ("transformers", "coqui")
+
+
+class ModelRegistry:
+    """Model definitions read from a TOML (or JSON) manifest
+
+    Each model entry is merged over the manifest's [defaults] and tagged with
+    a revision hash, so a change to any of its settings shows up as a new
+    revision. watch() polls the file and reports every successful reload; a
+    manifest that fails to parse or validate leaves the previous models in
+    place.
+    """
+
+    def __init__(self, path=None, poll_interval=None):
+        self.path = path or os.environ.get(
+            'TTS_MODELS_MANIFEST',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models.toml')
+        )
+        if poll_interval is None:
+            poll_interval = float(os.environ.get('TTS_MANIFEST_POLL_SECONDS', '5'))
+        self.poll_interval = poll_interval  # 0 disables hot reload
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error = None
+        self.loaded_at = None
+        self._mtime = None
+        self._watcher = None
+        self.models = self.load()
+
+    def load(self):
+        """Parse and validate the manifest; returns {model_id: settings}"""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'rb') as f:
+            if self.path.endswith('.json'):
+                manifest = json.load(f)
+            else:
+                manifest = tomllib.load(f)
+
+        defaults = manifest.get("defaults", {})
+        models = {}
+        for model_id, entry in manifest.get("models", {}).items():
+            settings = dict(defaults, **entry)
+            settings.setdefault("name", model_id)
+            settings.setdefault("speakers", None)
+            settings.setdefault("language", "aka")
+            self._validate(model_id, settings)
+            settings["revision"] = hashlib.sha256(
+                json.dumps(settings, sort_keys=True).encode('utf-8')
+            ).hexdigest()[:12]
+            models[model_id] = settings
+
+        self._mtime = mtime
+        self.loaded_at = time.time()
+        return models
+
+    @staticmethod
+    def _validate(model_id, settings):
+        if settings.get("type") not in MODEL_TYPES:
+            raise ValueError(f"Model {model_id}: type must be one of {', '.join(MODEL_TYPES)}")
+        if settings["type"] == "transformers" and not settings.get("hf_id"):
+            raise ValueError(f"Model {model_id}: transformers models need an hf_id")
+        if settings.get("backend") is not None and settings["backend"] not in BACKENDS:
+            raise ValueError(f"Model {model_id}: backend must be one of {', '.join(BACKENDS)}")
+        if settings["speakers"] is not None and not isinstance(settings["speakers"], list):
+            raise ValueError(f"Model {model_id}: speakers must be a list")
+        for key in ("threads", "batch_size", "concurrency"):
+            if settings.get(key) is not None and (not isinstance(settings[key], int) or settings[key] < 0):
+                raise ValueError(f"Model {model_id}: {key} must be a non-negative integer")
+
+    def watch(self, on_change):
+        """Reload in the background when the file changes, calling on_change(models)"""
+        if self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, args=(on_change,), name="model-manifest", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self, on_change):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if os.stat(self.path).st_mtime_ns == self._mtime:
+                    continue
+                models = self.load()
+            except Exception as e:
+                # Keep serving the last good manifest; retry after the next edit
+                self._mtime = self._stat_mtime()
+                self.reload_errors += 1
+                self.last_error = str(e)
+                logger.error(f"Failed to reload model manifest {self.path}: {str(e)}")
+                continue
+
+            self.models = models
+            self.reloads += 1
+            self.last_error = None
+            logger.info(f"Reloaded model manifest {self.path}: {len(models)} models")
+            try:
+                on_change(models)
+            except Exception as e:
+                logger.error(f"Failed to apply model manifest: {str(e)}")
+
+    def _stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get_stats(self):
+        return {
+            "path": self.path,
+            "models": len(self.models),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+        }
@@ -1,8 +1,19 @@
+import os
+import csv
+import logging
 from app import db
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
 
 class SynthesisLog(db.Model):
     """Log synthesis requests for audit purposes"""
+    __table_args__ = (
+        # Serves model_id filters together with newest-first keyset pagination
+        db.Index('ix_synthesis_log_model_id_id', 'model_id', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
     model_id = db.Column(db.String(256), nullable=False)
@@ -10,7 +21,101 @@ class SynthesisLog(db.Model):
     transcription = db.Column(db.Text, nullable=True)
     wer_score = db.Column(db.Float, nullable=True)
     audio_filename = db.Column(db.String(256), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    latency_ms = db.Column(db.Float, nullable=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Set at request time so the evaluation job can fill in its scores later
+    log_key = db.Column(db.String(36), nullable=True, index=True)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "text": self.text,
+            "model_id": self.model_id,
+            "speaker": self.speaker,
+            "transcription": self.transcription,
+            "wer_score": self.wer_score,
+            "audio_filename": self.audio_filename,
+            "latency_ms": self.latency_ms,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+        }
     
     def __repr__(self):
         return f'<SynthesisLog {self.id}: {self.model_id}>'
+
+class PoorQualitySample(db.Model):
+    """Synthesized samples whose ASR round-trip exceeded the WER threshold"""
+    __table_args__ = (
+        db.Index('ix_poor_quality_sample_model_speaker_time', 'model_id', 'speaker', 'timestamp'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    input_text = db.Column(db.Text, nullable=False)
+    transcribed_text = db.Column(db.Text, nullable=True)
+    wer_score = db.Column(db.Float, nullable=False, index=True)
+    model_id = db.Column(db.String(256), nullable=False)
+    speaker = db.Column(db.String(64), nullable=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<PoorQualitySample {self.id}: {self.model_id} WER={self.wer_score}>'
+
+
+def upgrade_schema():
+    """Bring tables created by older versions up to date
+    
+    db.create_all() only creates missing tables, so columns and indexes added
+    to existing models are applied here.
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        with db.engine.begin() as conn:
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def import_legacy_samples(csv_path):
+    """Move poor quality samples from the CSV log of older versions into the database
+    
+    Runs once: the file is renamed to <csv_path>.imported first, so only one
+    worker imports it, and renamed back if the import fails. Returns the
+    number of rows imported.
+    """
+    claimed = f"{csv_path}.imported"
+    try:
+        os.rename(csv_path, claimed)
+    except OSError:
+        # No legacy file, or another worker claimed it
+        return 0
+    
+    try:
+        samples = []
+        with open(claimed, newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                try:
+                    sample = PoorQualitySample(
+                        input_text=row["input_text"],
+                        transcribed_text=row.get("transcribed_text"),
+                        wer_score=float(row["wer_score"]),
+                        model_id=row["model_name"],
+                        speaker=row.get("speaker") or 'default',
+                    )
+                    if row.get("timestamp"):
+                        # The CSV has local time; the table stores UTC
+                        sample.timestamp = datetime.fromisoformat(row["timestamp"]).astimezone(timezone.utc).replace(tzinfo=None)
+                    samples.append(sample)
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping malformed poor quality sample in {csv_path}: {row}")
+        db.session.add_all(samples)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        os.rename(claimed, csv_path)
+        raise
+    logger.info(f"Imported {len(samples)} poor quality samples from {csv_path}")
+    return len(samples)
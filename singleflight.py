@@ -0,0 +1,99 @@
+import os
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on this platform; coalescing stays within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution
+
+    Within a process, callers that arrive while a key is in flight wait for
+    the leader and share its result. Across processes (gunicorn workers) the
+    leaders serialize on a per-key flock in lock_dir, and each one first
+    calls check() so it can pick up what another worker just produced.
+    """
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir
+        self.leaders = 0
+        self.followers = 0
+        self.cross_process_hits = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, fn, check=None, cross_process=True):
+        """Return (result, shared) where shared is True if another call produced it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            if cross_process and self.lock_dir and fcntl is not None:
+                call.result = self._run_locked(key, fn, check)
+            else:
+                call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run_locked(self, key, fn, check):
+        path = os.path.join(self.lock_dir, f"{key}.lock")
+        with open(path, 'a') as lock_file:
+            # Blocks while another worker is producing the same key
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Keep the lock file young so age-based cleanup leaves it alone
+                os.utime(path)
+                if check is not None:
+                    existing = check()
+                    if existing is not None:
+                        with self._lock:
+                            self.cross_process_hits += 1
+                        return existing
+                return fn()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "cross_process_hits": self.cross_process_hits,
+                "cross_process": bool(self.lock_dir and fcntl is not None),
+            }
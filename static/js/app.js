@@ -129,6 +129,7 @@ class KasaMframeApp {
             const data = await response.json();
 
             if (data.status === 'success') {
+                this.currentJobId = null;
                 this.displayResults(data, text);
                 this.showAlert('Speech synthesized successfully!', 'success');
             } else {
@@ -150,6 +151,60 @@ class KasaMframeApp {
         const audioPlayer = document.getElementById('audioPlayer');
         audioPlayer.src = `/api/audio/${data.audio_id}`;
 
+        // Evaluation results arrive from a background job
+        if (data.wer_score !== null && data.wer_score !== undefined) {
+            this.displayEvaluation(data);
+        } else if (data.job_id) {
+            this.displayEvaluationPending();
+            this.pollEvaluation(data.job_id);
+        } else {
+            document.getElementById('transcriptionText').textContent = 'Evaluation disabled';
+        }
+
+        // Scroll to results
+        document.getElementById('resultsCard').scrollIntoView({ 
+            behavior: 'smooth', 
+            block: 'start' 
+        });
+    }
+
+    displayEvaluationPending() {
+        document.getElementById('transcriptionText').textContent = 'Evaluating...';
+        document.getElementById('werProgressBar').style.width = '0%';
+        document.getElementById('werBadge').textContent = '-';
+        document.getElementById('werBadge').className = 'badge bg-secondary fs-6';
+        document.getElementById('qualityBadge').textContent = 'Pending';
+        document.getElementById('qualityBadge').className = 'badge bg-secondary fs-6';
+    }
+
+    async pollEvaluation(jobId) {
+        this.currentJobId = jobId;
+
+        while (this.currentJobId === jobId) {
+            try {
+                const response = await fetch(`/api/jobs/${encodeURIComponent(jobId)}`);
+                const data = await response.json();
+
+                if (data.status !== 'success') {
+                    break;
+                }
+                if (data.job.status === 'completed') {
+                    this.displayEvaluation(data.job.result);
+                    return;
+                }
+                if (data.job.status === 'failed') {
+                    document.getElementById('transcriptionText').textContent = 'Evaluation failed';
+                    return;
+                }
+            } catch (error) {
+                console.error('Error polling evaluation:', error);
+                break;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    displayEvaluation(data) {
         // Display transcription
         document.getElementById('transcriptionText').textContent = data.transcription;
 
@@ -160,7 +215,7 @@ class KasaMframeApp {
         const qualityBadge = document.getElementById('qualityBadge');
 
         // Update WER progress bar
-        werProgressBar.style.width = `${werPercentage}%`;
+        werProgressBar.style.width = `${Math.min(werPercentage, 100)}%`;
         werBadge.textContent = `${werPercentage}%`;
 
         // Set color based on WER score
@@ -184,12 +239,6 @@ class KasaMframeApp {
             qualityBadge.textContent = 'Good Quality';
             qualityBadge.className = 'badge bg-success fs-6';
         }
-
-        // Scroll to results
-        document.getElementById('resultsCard').scrollIntoView({ 
-            behavior: 'smooth', 
-            block: 'start' 
-        });
     }
 
     setLoadingState(isLoading, text = 'Processing...') {
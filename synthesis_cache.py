@@ -0,0 +1,157 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class SynthesisCache:
+    """Content-addressed on-disk cache of synthesized audio with LRU eviction"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get(
+            'SYNTHESIS_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'kasa_mframa_cache')
+        )
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('SYNTHESIS_CACHE_MAX_MB', '512')) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Rebuild the LRU index from files left by a previous process"""
+        try:
+            files = []
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith('.wav') or filename.endswith('.partial.wav'):
+                    continue
+                path = os.path.join(self.cache_dir, filename)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, filename[:-len('.wav')], stat.st_size))
+
+            for _, key, size in sorted(files):
+                self._entries[key] = size
+                self.total_bytes += size
+
+            self._evict()
+            logger.info(f"Synthesis cache ready: {len(self._entries)} entries, {self.total_bytes} bytes")
+        except Exception as e:
+            logger.error(f"Failed to index synthesis cache: {str(e)}")
+
+    @staticmethod
+    def normalize_text(text):
+        """Normalize text so trivially different inputs share a cache entry"""
+        text = unicodedata.normalize('NFC', text)
+        return ' '.join(text.split())
+
+    def make_key(self, text, model_id, speaker=None):
+        """Build the content address for a synthesis request"""
+        if not speaker or speaker == "default":
+            speaker = ""
+        payload = "\x1f".join([self.normalize_text(text), model_id, speaker])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        """Path of the cached WAV file for a key"""
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def partial_path_for(self, key):
+        """Scratch path synthesis writes to before the entry is committed"""
+        return os.path.join(self.cache_dir, f"{key}.{os.getpid()}.{threading.get_ident()}.partial.wav")
+
+    def get(self, key, record=True):
+        """Return the cached audio path for key, or None on a miss
+
+        record=False looks the entry up without touching the hit/miss counters,
+        for serving audio that was already accounted for at synthesis time.
+        """
+        path = self.path_for(key)
+        with self._lock:
+            if key in self._entries:
+                if os.path.exists(path):
+                    self._entries.move_to_end(key)
+                    self.hits += record
+                    self._touch(path)
+                    return path
+                # File was removed underneath us (e.g. tmp cleaner)
+                self.total_bytes -= self._entries.pop(key)
+            elif os.path.exists(path):
+                # Written by another worker sharing the cache directory
+                size = os.path.getsize(path)
+                self._entries[key] = size
+                self.total_bytes += size
+                self.hits += record
+                self._touch(path)
+                return path
+
+            self.misses += record
+            return None
+
+    @staticmethod
+    def _touch(path):
+        """Refresh the file's mtime so the audio store's TTL and size GC treat it as recently used"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def put(self, key, source_path):
+        """Move a freshly synthesized file into the cache and return its path"""
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self.total_bytes += size
+            self._evict(keep=key)
+
+        return path
+
+    def forget(self, key):
+        """Drop an entry whose file was deleted by someone else (e.g. audio store GC)"""
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)
+    
+    def _evict(self, keep=None):
+        """Drop least recently used entries until the cache fits its budget"""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            size = self._entries.pop(key)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def get_stats(self):
+        """Return cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,45 @@
+import json
+
+from evaluate_corpus import load_completed, percentile, summarize
+
+
+def write_results(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+        # Partially written last line from an interrupted run
+        f.write('{"id": "trunc')
+
+
+def scored(sample_id, wer):
+    return {"id": sample_id, "wer_score": wer, "substitutions": 1, "deletions": 0,
+            "insertions": 0, "reference_words": 2}
+
+
+def test_failed_samples_are_not_completed(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_results(path, [scored("1", 0.5), {"id": "2", "wer_score": None, "error": "synthesis failed"}])
+    assert load_completed(str(path)) == {"1"}
+
+
+def test_retried_sample_counts_once_with_its_latest_result(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_results(path, [
+        scored("1", 0.5),
+        {"id": "2", "wer_score": None, "error": "transcription failed"},
+        scored("2", 0.0),
+    ])
+    assert load_completed(str(path)) == {"1", "2"}
+    summary = summarize(str(path), threshold=0.3)
+    assert summary["samples"] == 2
+    assert summary["failures"] == 0
+    assert summary["mean_wer"] == 0.25
+    assert summary["corpus_wer"] == 0.5
+    assert summary["above_threshold"] == 1
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([1, 2, 3, 4, 5, 6], 50) == 3
+    assert percentile(list(range(1, 21)), 95) == 19
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
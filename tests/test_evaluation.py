@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from evaluation import WERCalculator
+
+
+def levenshtein(ref, hyp):
+    """Plain O(n*m) edit distance used as the reference"""
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1]
+
+
+def expected_rate(ref, hyp):
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return levenshtein(ref, hyp) / len(ref)
+
+
+WORDS = ["akwaaba", "me", "din", "de", "kofi", "wo", "ho", "te", "sɛn", "ɛyɛ"]
+
+
+def random_pairs(count, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        ref = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+        hyp = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+        pairs.append((ref, hyp))
+    return pairs
+
+
+EDGE_PAIRS = [
+    ("", ""),
+    ("", "me din"),
+    ("me din de kofi", ""),
+    ("me din de kofi", "me din de kofi"),
+    ("akwaaba", "akwaaba akwaaba"),
+]
+
+
+@pytest.fixture
+def calculator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return WERCalculator()
+
+
+@pytest.mark.parametrize("reference, hypothesis", EDGE_PAIRS + random_pairs(50))
+def test_measure_matches_reference_levenshtein(calculator, reference, hypothesis):
+    result = calculator.measure(reference, hypothesis)
+    ref_words, hyp_words = reference.split(), hypothesis.split()
+
+    assert result["wer"] == pytest.approx(expected_rate(ref_words, hyp_words))
+    assert result["cer"] == pytest.approx(expected_rate(reference, hypothesis))
+    errors = result["substitutions"] + result["deletions"] + result["insertions"]
+    assert errors == levenshtein(ref_words, hyp_words)
+    assert result["hits"] + result["substitutions"] + result["deletions"] == len(ref_words)
+    assert result["hits"] + result["substitutions"] + result["insertions"] == len(hyp_words)
+
+
+def test_measure_batch_matches_measure(calculator):
+    pairs = EDGE_PAIRS + random_pairs(300, seed=1)
+    references, hypotheses = zip(*pairs)
+
+    batch = calculator.measure_batch(list(references), list(hypotheses), return_alignment=True)
+
+    for (reference, hypothesis), result in zip(pairs, batch):
+        single = calculator.measure(reference, hypothesis, return_alignment=True)
+        assert result["wer"] == pytest.approx(single["wer"])
+        assert result["cer"] == pytest.approx(single["cer"])
+        assert result["cer"] == pytest.approx(expected_rate(reference, hypothesis))
+        for field in ("substitutions", "deletions", "insertions", "hits"):
+            assert result[field] == single[field]
+
+
+def test_measure_batch_rejects_mismatched_lengths(calculator):
+    with pytest.raises(ValueError):
+        calculator.measure_batch(["a"], [])
+
+
+def test_calculate_wer_empty_inputs(calculator):
+    assert calculator.calculate_wer("", "me din") == 1.0
+    assert calculator.calculate_wer("me din", "") == 1.0
+    assert calculator.calculate_wer("Me din", "me din") == 0.0
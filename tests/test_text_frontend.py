@@ -0,0 +1,37 @@
+import unicodedata
+
+import pytest
+
+from text_frontend import normalize_text, prepare_sentences
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ɔ̀kɔ́ fie.", "ɔ̀kɔ́ fie"),
+    ("mɛ̀kɔ", "mɛ̀kɔ"),
+    ("Mɛ̀kɔ́ fie!", "mɛ̀kɔ́ fie"),
+    ("mɛ̀-kɔ́", "mɛ̀-kɔ́"),
+    ("mɛ̀'kɔ", "mɛ̀'kɔ"),
+    ("Àkwáàbá, Kofi!", "àkwáàbá kofi"),
+])
+def test_normalize_text_keeps_tone_marks_on_their_word(text, expected):
+    assert normalize_text(text, "aka") == unicodedata.normalize("NFC", expected)
+
+
+def test_normalize_text_does_not_split_words_at_combining_marks():
+    text = "Ɔ̀kɔ́ fie na mɛ̀kɔ́ sukuu."
+    assert len(normalize_text(text, "aka").split()) == len(text.split())
+
+
+def test_normalize_text_drops_punctuation_and_lowercases():
+    assert normalize_text("Akwaaba!  Wo ho te sɛn?", "aka") == "akwaaba wo ho te sɛn"
+    assert normalize_text("'quoted' - word", "aka") == "quoted word"
+
+
+def test_normalize_text_spells_numbers():
+    assert normalize_text("Me wɔ 2", "aka") == "me wɔ mmienu"
+    assert normalize_text("Nina 2", "swh") == "nina mbili"
+
+
+def test_prepare_sentences_splits_and_normalizes():
+    assert prepare_sentences("Ɔ̀kɔ́ fie. Me wɔ 2!", "aka") == ["ɔ̀kɔ́ fie", "me wɔ mmienu"]
+    assert prepare_sentences("?!", "aka") == []
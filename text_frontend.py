@@ -0,0 +1,156 @@
+import re
+import logging
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends: terminal punctuation followed by whitespace
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;])\s+')
+# Clause boundaries used to break up sentences that are still too long
+_CLAUSE_BOUNDARY = re.compile(r'(?<=[,:—])\s+')
+
+
+def split_sentences(text):
+    """Split text into sentences at terminal punctuation"""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence.strip()]
+
+
+def _split_long(sentence, max_chars):
+    """Break a sentence at clause boundaries, then whitespace, to fit max_chars"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    pieces = []
+    current = ""
+    for clause in _CLAUSE_BOUNDARY.split(sentence):
+        candidate = f"{current} {clause}".strip()
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        current = clause
+
+        # A single clause longer than the limit is split between words
+        while len(current) > max_chars:
+            cut = current.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(current[:cut].strip())
+            current = current[cut:].strip()
+
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text_chunks(text, max_chars=200):
+    """Split text into synthesis-sized chunks at sentence or clause boundaries"""
+    chunks = []
+    for sentence in split_sentences(text):
+        chunks.extend(_split_long(sentence, max_chars))
+    return chunks
+
+
+# Number words; Akan follows Asante Twi usage
+_NUMBER_WORDS = {
+    "aka": {
+        "units": ["hwee", "baako", "mmienu", "mmiɛnsa", "nnan", "nnum", "nsia", "nson", "nwɔtwe", "nkron"],
+        "teens": ["du", "dubaako", "dumienu", "dumiɛnsa", "dunan", "dunum", "dunsia", "dunson", "dunwɔtwe", "dunkron"],
+        "tens": [None, None, "aduonu", "aduasa", "aduanan", "aduonum", "aduosia", "aduɔson", "aduɔwɔtwe", "aduɔkron"],
+        "hundreds": [None, "ɔha", "ahanu", "ahasa", "ahanan", "ahanum", "ahasia", "ahason", "ahawɔtwe", "ahakron"],
+        "and": "ne",
+        "point": "pɔint",
+    },
+    "swh": {
+        "units": ["sifuri", "moja", "mbili", "tatu", "nne", "tano", "sita", "saba", "nane", "tisa"],
+        "teens": ["kumi"] + [f"kumi na {unit}" for unit in ["moja", "mbili", "tatu", "nne", "tano", "sita", "saba", "nane", "tisa"]],
+        "tens": [None, None, "ishirini", "thelathini", "arobaini", "hamsini", "sitini", "sabini", "themanini", "tisini"],
+        "hundreds": [None] + [f"mia {unit}" for unit in ["moja", "mbili", "tatu", "nne", "tano", "sita", "saba", "nane", "tisa"]],
+        "and": "na",
+        "point": "nukta",
+    },
+}
+
+_NUMBER = re.compile(r'\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?')
+# Combining marks (e.g. Akan tone marks in "Ɔ̀kɔ́") are part of the word they sit on;
+# re's \w does not match them
+_MARKS = "\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f"
+# Punctuation the synthesizers do not voice; apostrophes and hyphens inside words are kept
+_PUNCTUATION = re.compile(rf"[^\w\s'\-{_MARKS}]|(?<![\w{_MARKS}])['\-]|['\-](?![\w{_MARKS}])")
+_REPLACEMENTS = str.maketrans({"‘": "'", "’": "'", "ʼ": "'", "–": "-", "—": "-", " ": " "})
+
+
+def _below_thousand(number, words):
+    """Words for 0 < number < 1000"""
+    parts = []
+    hundreds, rest = divmod(number, 100)
+    if hundreds:
+        parts.append(words["hundreds"][hundreds])
+    tens, units = divmod(rest, 10)
+    if tens == 1:
+        parts.append(words["teens"][units])
+    elif tens:
+        parts.append(words["tens"][tens] if not units else f"{words['tens'][tens]} {words['and']} {words['units'][units]}")
+    elif units:
+        if parts:
+            parts.append(words["and"])
+        parts.append(words["units"][units])
+    return " ".join(parts)
+
+
+def number_to_words(number, language="aka"):
+    """Spell out a non-negative integer in Akan ("aka") or Swahili ("swh")"""
+    words = _NUMBER_WORDS.get(language, _NUMBER_WORDS["aka"])
+    if number == 0:
+        return words["units"][0]
+
+    millions, rest = divmod(number, 1000000)
+    thousands, rest = divmod(rest, 1000)
+    parts = []
+    if millions:
+        if language == "swh":
+            parts.append(f"milioni {number_to_words(millions, language)}")
+        else:
+            parts.append(f"ɔpepem {number_to_words(millions, language)}")
+    if thousands:
+        if language == "swh":
+            parts.append(f"elfu {_below_thousand(thousands, words)}")
+        elif thousands == 1:
+            parts.append("apem")
+        else:
+            parts.append(f"mpem {_below_thousand(thousands, words)}")
+    if rest:
+        if parts:
+            parts.append(words["and"])
+        parts.append(_below_thousand(rest, words))
+    return " ".join(parts)
+
+
+def _spell_number(match, language):
+    digits = match.group(0).replace(',', '')
+    integer, _, fraction = digits.partition('.')
+    spoken = number_to_words(int(integer), language)
+    if fraction:
+        words = _NUMBER_WORDS.get(language, _NUMBER_WORDS["aka"])
+        spoken += " " + " ".join([words["point"]] + [words["units"][int(digit)] for digit in fraction])
+    return spoken
+
+
+def normalize_text(text, language="aka"):
+    """Normalize one sentence for synthesis
+
+    Spells out numbers, lowercases, drops punctuation the models do not
+    voice and collapses whitespace, so "Akwaaba!" and "akwaaba" synthesize
+    (and cache) identically.
+    """
+    text = unicodedata.normalize('NFC', text).translate(_REPLACEMENTS)
+    text = _NUMBER.sub(lambda match: _spell_number(match, language), text)
+    text = _PUNCTUATION.sub(' ', text.lower())
+    return ' '.join(text.split())
+
+
+def prepare_sentences(text, language="aka", max_chars=200):
+    """Split text into synthesis-sized sentences and normalize each one"""
+    sentences = (normalize_text(chunk, language) for chunk in split_text_chunks(text, max_chars))
+    return [sentence for sentence in sentences if sentence]
@@ -1,29 +1,62 @@
 import os
+import time
 import logging
-import sys
-import glob
+import threading
+import importlib.util
+from contextlib import contextmanager
+from collections import defaultdict
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-try:
-    import torch
-    import numpy as np
-    import scipy.io.wavfile
-    from transformers import pipeline, VitsModel, VitsTokenizer
-    TORCH_AVAILABLE = True
-    print(f"PyTorch {torch.__version__} loaded successfully")
-except ImportError as e:
-    TORCH_AVAILABLE = False
-    torch = None
-    print(f"PyTorch not available: {e}")
+# Heavy ML libraries are only located here; they are imported on first model
+# load so that importing this module (and starting the web server) stays fast
+torch = None
+pipeline = None
+CoquiTTS = None
+_import_lock = threading.Lock()
+
+
+def _module_available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+TORCH_AVAILABLE = _module_available("torch") and _module_available("transformers")
+COQUI_AVAILABLE = _module_available("TTS")
+
+
+def _import_torch():
+    """Import torch and the transformers pipeline on first use"""
+    global torch, pipeline
+    with _import_lock:
+        if torch is None:
+            import torch as torch_module
+            from transformers import pipeline as transformers_pipeline
+            pipeline = transformers_pipeline
+            torch = torch_module
+            print(f"PyTorch {torch.__version__} loaded successfully")
+    return torch
+
 
-# Try to import Coqui TTS
-try:
-    from TTS.api import TTS as CoquiTTS
-    COQUI_AVAILABLE = True
-except ImportError:
-    COQUI_AVAILABLE = False
-    CoquiTTS = None
+def _import_coqui():
+    """Import Coqui TTS on first use"""
+    global CoquiTTS
+    with _import_lock:
+        if CoquiTTS is None:
+            from TTS.api import TTS
+            CoquiTTS = TTS
+    return CoquiTTS
+
+from audio_utils import to_int16
+from batching import MicroBatcher
+from model_pool import ModelPool
+from metrics import stage, observe_stage
+from inference_backends import apply_backend, default_backend
+from model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -31,47 +64,48 @@ class TTSService:
     """Text-to-Speech service supporting multiple model types"""
     
     def __init__(self):
-        self.models = {}
+        self.model_pool = ModelPool()
+        self.preload_models = [
+            model_id.strip()
+            for model_id in os.environ.get('TTS_PRELOAD_MODELS', '').split(',')
+            if model_id.strip()
+        ]
+        self.preload_complete = threading.Event()
+        self.preload_results = {}  # model id -> None once loaded, else why it failed
+        self.batchers = {}
+        self._batchers_lock = threading.Lock()
+        self.batch_max_size = int(os.environ.get('TTS_BATCH_MAX_SIZE', '8'))
+        self.batch_window_ms = float(os.environ.get('TTS_BATCH_WINDOW_MS', '10'))
+        self._device = None
         if TORCH_AVAILABLE:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            print(f"TTS Service initialized on device: {self.device}")
+            print("TTS Service initialized; PyTorch will be loaded with the first model")
         else:
-            self.device = "cpu"
             print("TTS Service initialized without PyTorch - using fallback mode")
         
-        # Define available models
-        self.available_models = {
-            "facebook_mms-tts-aka": {
-                "name": "Facebook MMS TTS Akan",
-                "type": "transformers",
-                "speakers": None,
-                "hf_id": "facebook/mms-tts-aka"
-            },
-            "hci-lab-dcug_ugtts-multispeaker-max40secs-total2hrs-sr22050-mms-aka-finetuned": {
-                "name": "HCI Lab DCSUG Akan Finetuned",
-                "type": "transformers", 
-                "speakers": ["IM"],
-                "hf_id": "hci-lab-dcug/ugtts-multispeaker-max40secs-total2hrs-sr22050-mms-aka-finetuned"
-            },
-            "hci-lab-dcug_ugtts-multispeaker-max40secs-total2hrs-sr22050-mms-swh-finetuned": {
-                "name": "Swahili Finetuned",
-                "type": "transformers",
-                "speakers": ["IM"],
-                "hf_id": "hci-lab-dcug/ugtts-multispeaker-max40secs-total2hrs-sr22050-mms-swh-finetuned"
-            }
-        }
-        
-        # Add Coqui TTS models if available
-        if COQUI_AVAILABLE:
-            self.available_models.update({
-                "hci-lab-dcug_ugtts-multispeaker-max40secs-total2hrs-sr22050": {
-                    "name": "HCI Lab DCSUG Multispeaker",
-                    "type": "coqui",
-                    "model_path": "/tmp/ugtts-model/best_model.pth",
-                    "config_path": "/tmp/ugtts-model/config.json",
-                    "speakers": ["IM", "PT", "AN"]
-                }
-            })
+        # Models come from the manifest (models.toml) and follow its changes
+        self.registry = ModelRegistry()
+        self._models_lock = threading.Lock()
+        self._inflight = defaultdict(int)  # pool key -> requests using it
+        self._inflight_changed = threading.Condition()
+        self._speaker_inputs = {}  # pool key -> Coqui speaker conditioning
+        self._speakers_lock = threading.Lock()
+        self.drain_timeout = float(os.environ.get('TTS_DRAIN_TIMEOUT', '300'))
+        self.available_models = self._models_from_manifest(self.registry.models)
+        for model_id, model_info in self.available_models.items():
+            if model_info.get("preload") and model_id not in self.preload_models:
+                self.preload_models.append(model_id)
+        self.registry.watch(self._apply_manifest)
+    
+    @property
+    def device(self):
+        """Inference device, resolved when the first model is loaded"""
+        if self._device is None:
+            if TORCH_AVAILABLE and _import_torch().cuda.is_available():
+                self._device = "cuda"
+            else:
+                self._device = "cpu"
+            print(f"TTS Service using device: {self._device}")
+        return self._device
     
     def get_available_models(self):
         """Return list of available models"""
@@ -95,33 +129,137 @@ class TTSService:
         
         return speakers
     
+    def has_speaker(self, model_id, speaker):
+        """Whether a model can synthesize with speaker (None and "default" always can)"""
+        if not speaker or speaker == "default":
+            return True
+        return speaker in self.get_speakers(model_id)
+    
+    def _models_from_manifest(self, models):
+        """Manifest entries this process can serve"""
+        return {
+            model_id: dict(model_info)
+            for model_id, model_info in models.items()
+            if model_info["type"] != "coqui" or COQUI_AVAILABLE
+        }
+    
+    def _apply_manifest(self, models):
+        """Switch to a reloaded manifest without dropping in-flight requests
+        
+        New requests see the new definitions at once. Models that changed or
+        were removed are evicted once their in-flight requests finish, and
+        new or changed models marked preload are loaded in the background.
+        """
+        new_models = self._models_from_manifest(models)
+        with self._models_lock:
+            old_models = self.available_models
+            self.available_models = new_models
+        
+        retired = [
+            self._pool_key(model_id, model_info)
+            for model_id, model_info in old_models.items()
+            if new_models.get(model_id, {}).get("revision") != model_info.get("revision")
+        ]
+        for key in retired:
+            threading.Thread(target=self._drain, args=(key,), name="tts-drain", daemon=True).start()
+        for model_id in old_models:
+            if model_id not in new_models:
+                self.preload_results.pop(model_id, None)
+        
+        updated = [
+            model_id for model_id, model_info in new_models.items()
+            if old_models.get(model_id, {}).get("revision") != model_info.get("revision")
+        ]
+        logger.info(f"Model manifest applied: {len(updated)} new or changed, {len(retired)} retiring")
+        to_preload = [model_id for model_id in updated if new_models[model_id].get("preload")]
+        if to_preload:
+            self.preload(to_preload)
+    
+    def _drain(self, key):
+        """Evict a retired model version once no request is using it"""
+        deadline = time.monotonic() + self.drain_timeout
+        with self._inflight_changed:
+            while self._inflight.get(key) and time.monotonic() < deadline:
+                self._inflight_changed.wait(deadline - time.monotonic())
+            if self._inflight.get(key):
+                logger.warning(f"Unloading {key} with {self._inflight[key]} requests still running after {self.drain_timeout:.0f}s")
+        with self._batchers_lock:
+            batcher = self.batchers.pop(key, None)
+        if batcher is not None:
+            batcher.close()
+        with self._speakers_lock:
+            self._speaker_inputs.pop(key, None)
+        if self.model_pool.evict(key):
+            logger.info(f"Drained and unloaded model: {key}")
+    
+    @staticmethod
+    def _pool_key(model_id, model_info):
+        """Model pool key; each manifest revision of a model is loaded separately"""
+        revision = (model_info or {}).get("revision")
+        return f"{model_id}@{revision}" if revision else model_id
+    
+    @contextmanager
+    def _using(self, model_id):
+        """Count a request against the current version of a model while it runs"""
+        key = self._pool_key(model_id, self.available_models.get(model_id))
+        with self._inflight_changed:
+            self._inflight[key] += 1
+        try:
+            yield
+        finally:
+            with self._inflight_changed:
+                self._inflight[key] -= 1
+                if not self._inflight[key]:
+                    del self._inflight[key]
+                    self._inflight_changed.notify_all()
+    
+    def cache_enabled(self, model_id):
+        """Whether synthesized audio for a model may be reused from the cache"""
+        return self.available_models.get(model_id, {}).get("cache", True)
+    
+    def get_language(self, model_id):
+        """Language code used by the text front-end for a model"""
+        return self.available_models.get(model_id, {}).get("language", "aka")
+    
     def _load_model(self, model_id):
+        """Get a TTS model from the pool, loading it on first use"""
+        model_info = self.available_models.get(model_id)
+        return self.model_pool.get(
+            self._pool_key(model_id, model_info),
+            lambda key: self._create_model(model_id, model_info)
+        )
+    
+    def _create_model(self, model_id, model_info=None):
         """Load a TTS model"""
-        if model_id in self.models:
-            return self.models[model_id]
-        
+        started = time.perf_counter()
         try:
             print(f"Loading TTS model: {model_id}")
             
-            model_info = self.available_models.get(model_id)
+            model_info = model_info or self.available_models.get(model_id)
             if not model_info:
                 raise ValueError(f"Unknown model: {model_id}")
             
             if model_info["type"] == "transformers":
                 if not TORCH_AVAILABLE:
                     raise ValueError("PyTorch not available for transformers models")
+                _import_torch()
                 # Use transformers pipeline
                 synthesizer = pipeline(
                     "text-to-speech",
                     model=model_info["hf_id"],
                     device=0 if self.device == "cuda" else -1
                 )
-                self.models[model_id] = synthesizer
-                print(f"Successfully loaded model: {model_id}")
+                backend = self._backend_for(model_id)
+                if backend != "eager":
+                    synthesizer.model = apply_backend(
+                        synthesizer.model, backend, cache_key=model_info["hf_id"], threads=model_info.get("threads")
+                    )
+                print(f"Successfully loaded model: {model_id} ({backend})")
                 return synthesizer
             elif model_info["type"] == "coqui":
                 if not COQUI_AVAILABLE:
                     raise ValueError("Coqui TTS not available. Please install it first.")
+                _import_coqui()
                 
                 # Load Coqui TTS model
                 model_path = model_info.get("model_path")
@@ -139,7 +277,6 @@ class TTSService:
                 if self.device == "cuda":
                     synthesizer = synthesizer.to("cuda")
                 
-                self.models[model_id] = synthesizer
                 print(f"Successfully loaded Coqui model: {model_id}")
                 return synthesizer
             else:
@@ -148,82 +285,390 @@ class TTSService:
         except Exception as e:
             print(f"Failed to load model {model_id}: {str(e)}")
             raise
+        finally:
+            observe_stage("model_load", time.perf_counter() - started, model_id)
+    
+    def _backend_for(self, model_id):
+        """Inference backend for a transformers model (see inference_backends)"""
+        backend = self.available_models[model_id].get("backend") or default_backend()
+        if backend != "eager" and self.device == "cuda":
+            # The alternative backends target CPU inference
+            return "eager"
+        return backend
+    
+    def preload(self, model_ids=None, background=True):
+        """Warm models at worker boot so first requests skip the load latency
+        
+        Defaults to the comma-separated TTS_PRELOAD_MODELS list ("all" loads
+        every available model).
+        """
+        if model_ids is None:
+            model_ids = self.preload_models
+        if "all" in model_ids:
+            model_ids = list(self.available_models)
+        
+        def run():
+            for model_id in model_ids:
+                if model_id not in self.available_models:
+                    print(f"Skipping preload of unknown model: {model_id}")
+                    self.preload_results[model_id] = "unknown model"
+                    continue
+                try:
+                    self._load_model(model_id)
+                    self.preload_results[model_id] = None
+                except Exception as e:
+                    print(f"Preload failed for {model_id}: {str(e)}")
+                    self.preload_results[model_id] = str(e)
+            self.preload_complete.set()
+        
+        if background:
+            threading.Thread(target=run, name="tts-preload", daemon=True).start()
+        else:
+            run()
+    
+    def preload_status(self):
+        """Model id -> None if its preload succeeded, else the error, for every model preloaded so far"""
+        return dict(self.preload_results)
+    
+    def get_model_status(self):
+        """Return per-model load time and residency"""
+        status = self.model_pool.get_status()
+        status["preload"] = {
+            "models": self.preload_models,
+            "complete": self.preload_complete.is_set(),
+            "errors": {model_id: error for model_id, error in self.preload_status().items() if error},
+        }
+        status["manifest"] = self.registry.get_stats()
+        with self._inflight_changed:
+            status["in_flight"] = dict(self._inflight)
+        return status
     
     def synthesize(self, text, model_id, output_path, speaker=None):
         """Synthesize speech from text"""
+        with self._using(model_id):
+            return self._synthesize(text, model_id, output_path, speaker)
+    
+    def _synthesize(self, text, model_id, output_path, speaker=None):
         try:
             model_info = self.available_models[model_id]
-            print(f"Synthesizing: '{text}' with model {model_id}, speaker: {speaker}")
+            logger.debug(f"Synthesizing {len(text)} characters with model {model_id}, speaker: {speaker}")
             
             if model_info["type"] == "transformers":
                 if not TORCH_AVAILABLE:
                     print("Cannot synthesize with transformers - PyTorch not available")
                     return False
                     
-                # Load model
-                synthesizer = self._load_model(model_id)
-                
-                # Transformers pipeline synthesis
-                synthesis_kwargs = {}
-                if speaker and speaker != "default":
-                    synthesis_kwargs["speaker_id"] = model_info["speakers"].index(speaker)
-                speech = synthesizer(text, forward_params=synthesis_kwargs)
-                # Save audio file
-                import numpy as np
-                import scipy.io.wavfile
-                sample_rate = speech.get("sampling_rate", 22050)
-                audio_data = speech["audio"]
-                
-                # Handle different audio data formats
-                if isinstance(audio_data, list):
-                    audio_data = np.array(audio_data)
-                elif hasattr(audio_data, 'numpy'):
-                    audio_data = audio_data.numpy()
-                
-                # Ensure audio data is in the right format
-                if len(audio_data.shape) > 1:
-                    audio_data = audio_data[0]  # Take first channel if stereo
-                
-                # Normalize audio data
-                if audio_data.dtype != np.int16:
-                    audio_data = (audio_data * 32767).astype(np.int16)
-                
-                # Save to file
-                scipy.io.wavfile.write(output_path, sample_rate, audio_data)
+                audio_data, sample_rate = self._generate_transformers(model_id, text, speaker)
                 
             elif model_info["type"] == "coqui":
                 if not COQUI_AVAILABLE:
                     print("Cannot synthesize with Coqui - TTS not available")
                     return False
-                    
-                # Load model
-                synthesizer = self._load_model(model_id)
                 
-                # Coqui TTS synthesis
-                if speaker and speaker != "default":
-                    synthesizer.tts_to_file(
-                        text=text,
-                        file_path=output_path,
-                        speaker=speaker
-                    )
-                else:
-                    synthesizer.tts_to_file(
-                        text=text,
-                        file_path=output_path,
-                        speaker=model_info["speakers"][0]
-                    )
+                audio_data, sample_rate = self._generate_coqui(model_id, text, speaker)
             else:
                 # Generate simple test audio for unsupported model types
                 print(f"Generating test audio for unsupported model type: {model_info['type']}")
                 self._generate_test_audio(output_path)
+                return True
+            
+            with stage("int16_convert", model_id, speaker):
+                audio_data = to_int16(audio_data)
             
-            print(f"Audio saved to: {output_path}")
+            # Save to file
+            import scipy.io.wavfile
+            with stage("file_write", model_id, speaker):
+                scipy.io.wavfile.write(output_path, sample_rate, audio_data)
+            
+            logger.debug(f"Audio saved to: {output_path}")
             return True
             
         except Exception as e:
             print(f"Synthesis failed: {str(e)}")
             return False
     
+    def synthesize_audio(self, text, model_id, speaker=None):
+        """Synthesize speech into memory
+        
+        Returns (int16 waveform, sample_rate), or None if synthesis failed.
+        """
+        with self._using(model_id):
+            return self._synthesize_audio(text, model_id, speaker)
+    
+    def _synthesize_audio(self, text, model_id, speaker=None):
+        try:
+            model_info = self.available_models[model_id]
+            logger.debug(f"Synthesizing {len(text)} characters in memory with model {model_id}, speaker: {speaker}")
+            
+            if model_info["type"] == "transformers":
+                if not TORCH_AVAILABLE:
+                    print("Cannot synthesize with transformers - PyTorch not available")
+                    return None
+                
+                audio_data, sample_rate = self._generate_transformers(model_id, text, speaker)
+                
+            elif model_info["type"] == "coqui":
+                if not COQUI_AVAILABLE:
+                    print("Cannot synthesize with Coqui - TTS not available")
+                    return None
+                
+                audio_data, sample_rate = self._generate_coqui(model_id, text, speaker)
+            else:
+                # Generate simple test audio for unsupported model types
+                print(f"Generating test audio for unsupported model type: {model_info['type']}")
+                sample_rate = 22050
+                t = np.arange(int(sample_rate * 2.0)) / sample_rate
+                audio_data = 0.3 * np.sin(2.0 * np.pi * 440.0 * t)
+            
+            with stage("int16_convert", model_id, speaker):
+                audio_data = to_int16(audio_data)
+            return audio_data, sample_rate
+            
+        except Exception as e:
+            print(f"Synthesis failed: {str(e)}")
+            return None
+    
+    def synthesize_audio_batch(self, items, model_id):
+        """Synthesize several (text, speaker) pairs into memory in one call
+        
+        Returns a list of (int16 waveform, sample_rate), or None if synthesis failed.
+        """
+        with self._using(model_id):
+            try:
+                model_info = self.available_models[model_id]
+                if model_info["type"] == "coqui":
+                    if not COQUI_AVAILABLE:
+                        print("Cannot synthesize with Coqui - TTS not available")
+                        return None
+                    results = self._synthesize_coqui_batch(model_id, items)
+                elif model_info["type"] == "transformers":
+                    if not TORCH_AVAILABLE:
+                        print("Cannot synthesize with transformers - PyTorch not available")
+                        return None
+                    results = self._synthesize_transformers_items(model_id, items)
+                else:
+                    results = []
+                    for text, speaker in items:
+                        result = self._synthesize_audio(text, model_id, speaker)
+                        if result is None:
+                            return None
+                        results.append(result)
+                    return results
+                
+                with stage("int16_convert", model_id):
+                    return [(to_int16(audio_data), sample_rate) for audio_data, sample_rate in results]
+            
+            except Exception as e:
+                print(f"Batch synthesis failed: {str(e)}")
+                return None
+    
+    def _synthesize_transformers_items(self, model_id, items):
+        """Run (text, speaker) pairs through _synthesize_batch, one speaker group at a time"""
+        speakers = self.available_models[model_id]["speakers"]
+        batch_size = max(1, self.batch_size_for(model_id))
+        groups = defaultdict(list)
+        for index, (text, speaker) in enumerate(items):
+            speaker_id = speakers.index(speaker) if speaker and speaker != "default" else None
+            groups[speaker_id].append(index)
+        
+        results = [None] * len(items)
+        for speaker_id, indices in groups.items():
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start:start + batch_size]
+                outputs = self._synthesize_batch(model_id, [items[i][0] for i in chunk], speaker_id)
+                for index, output in zip(chunk, outputs):
+                    results[index] = output
+        return results
+    
+    def _generate_transformers(self, model_id, text, speaker=None):
+        """Run a transformers model and return the raw (waveform, sample_rate)"""
+        model_info = self.available_models[model_id]
+        
+        # Load model
+        synthesizer = self._load_model(model_id)
+        
+        speaker_id = None
+        if speaker and speaker != "default":
+            speaker_id = model_info["speakers"].index(speaker)
+        
+        if self.batch_size_for(model_id) > 1:
+            # Concurrent requests for this model share one batched forward pass
+            return self._get_batcher(model_id).submit(text, group=speaker_id).result()
+        
+        if self._backend_for(model_id) != "eager":
+            # Quantized/compiled/ONNX models are called directly, not via the pipeline
+            return self._synthesize_batch(model_id, [text], speaker_id)[0]
+        
+        # Transformers pipeline synthesis
+        synthesis_kwargs = {}
+        if speaker_id is not None:
+            synthesis_kwargs["speaker_id"] = speaker_id
+        # The pipeline tokenizes internally, so this stage covers both
+        with stage("forward", model_id, speaker):
+            speech = synthesizer(text, forward_params=synthesis_kwargs)
+        return speech["audio"], speech.get("sampling_rate", 22050)
+    
+    def _generate_coqui(self, model_id, text, speaker=None):
+        """Run a Coqui model and return the raw (waveform, sample_rate)"""
+        if not self.has_speaker(model_id, speaker):
+            # Checked here so a bad speaker fails only this request, not its batch
+            raise ValueError(f"Unknown speaker for {model_id}: {speaker}")
+        if self.batch_size_for(model_id) > 1:
+            # Coqui VITS conditions each row on its own speaker, so all
+            # concurrent requests for the model can share a batch
+            return self._get_batcher(model_id).submit((text, speaker)).result()
+        return self._synthesize_coqui_batch(model_id, [(text, speaker)])[0]
+    
+    def _coqui_speakers(self, model_id, synthesizer):
+        """Speaker name -> (name, conditioning inputs), resolved once per model version"""
+        key = self._pool_key(model_id, self.available_models.get(model_id))
+        with self._speakers_lock:
+            speakers = self._speaker_inputs.get(key)
+            if speakers is None:
+                speakers = self._speaker_inputs[key] = self._resolve_coqui_speakers(model_id, synthesizer)
+            return speakers
+    
+    def _resolve_coqui_speakers(self, model_id, synthesizer):
+        """Look up speaker ids or mean d-vectors for every listed speaker
+        
+        None and "default" map to the first listed speaker.
+        """
+        import torch
+        
+        names = self.available_models[model_id]["speakers"] or []
+        tts_model = synthesizer.synthesizer.tts_model
+        manager = getattr(tts_model, "speaker_manager", None)
+        use_d_vectors = getattr(getattr(tts_model, "args", None), "use_d_vector_file", False)
+        
+        speakers = {}
+        for name in names:
+            if manager is None:
+                conditioning = {}
+            elif use_d_vectors:
+                d_vector = manager.get_mean_embedding(name, num_samples=None, randomize=False)
+                conditioning = {"d_vectors": torch.tensor(np.asarray(d_vector), dtype=torch.float32).view(1, -1)}
+            else:
+                conditioning = {"speaker_ids": torch.tensor([manager.name_to_id[name]], dtype=torch.long)}
+            speakers[name] = (name, conditioning)
+        speakers[None] = speakers["default"] = speakers[names[0]] if names else (None, {})
+        return speakers
+    
+    def _synthesize_coqui_batch(self, model_id, items):
+        """Synthesize (text, speaker) pairs with a Coqui model in memory
+        
+        VITS models run one padded forward pass with a speaker per row; other
+        architectures fall back to one tts() call per item. Returns a
+        (waveform, sample_rate) pair per item.
+        """
+        import torch
+        
+        synthesizer = self._load_model(model_id)
+        speakers = self._coqui_speakers(model_id, synthesizer)
+        resolved = []
+        for text, speaker in items:
+            if speaker not in speakers:
+                raise ValueError(f"Unknown speaker for {model_id}: {speaker}")
+            resolved.append((text, *speakers[speaker]))
+        
+        tts_model = synthesizer.synthesizer.tts_model
+        sample_rate = synthesizer.synthesizer.output_sample_rate
+        names = {name for _, name, _ in resolved}
+        label = next(iter(names)) if len(names) == 1 else None
+        
+        if type(tts_model).__name__ != "Vits":
+            results = []
+            for text, name, _ in resolved:
+                with stage("forward", model_id, name):
+                    results.append((np.asarray(synthesizer.tts(text=text, speaker=name)), sample_rate))
+            return results
+        
+        with stage("tokenize", model_id, label):
+            ids = [tts_model.tokenizer.text_to_ids(text) for text, _, _ in resolved]
+            lengths = [len(sequence) for sequence in ids]
+            # Padding positions are masked out through x_lengths
+            inputs = torch.zeros((len(ids), max(lengths)), dtype=torch.long)
+            for row, sequence in enumerate(ids):
+                inputs[row, :len(sequence)] = torch.tensor(sequence, dtype=torch.long)
+            aux_input = {"x_lengths": torch.tensor(lengths, dtype=torch.long)}
+            for name in ("speaker_ids", "d_vectors"):
+                parts = [conditioning[name] for _, _, conditioning in resolved if name in conditioning]
+                if parts:
+                    aux_input[name] = torch.cat(parts)
+            device = next(tts_model.parameters()).device
+            inputs = inputs.to(device)
+            aux_input = {name: tensor.to(device) for name, tensor in aux_input.items()}
+        
+        with stage("forward", model_id, label), torch.no_grad():
+            outputs = tts_model.inference(inputs, aux_input=aux_input)
+        
+        waveforms = outputs["model_outputs"].squeeze(1).cpu().numpy()
+        frames = outputs["y_mask"].sum(dim=(1, 2)).long().cpu().numpy()
+        hop_length = tts_model.config.audio.hop_length
+        return [(waveforms[i, :frames[i] * hop_length], sample_rate) for i in range(len(items))]
+    
+    def batch_size_for(self, model_id):
+        """Micro-batch size for a model (manifest batch_size, else TTS_BATCH_MAX_SIZE)"""
+        batch_size = self.available_models.get(model_id, {}).get("batch_size")
+        return self.batch_max_size if batch_size is None else batch_size
+    
+    def _get_batcher(self, model_id):
+        """Get the micro-batching scheduler for a model
+        
+        Transformers requests are grouped by speaker id; Coqui requests are
+        (text, speaker) pairs that can all share one batch.
+        """
+        model_info = self.available_models.get(model_id)
+        key = self._pool_key(model_id, model_info)
+        if model_info and model_info["type"] == "coqui":
+            run_batch = lambda group, items: self._synthesize_coqui_batch(model_id, items)
+        else:
+            run_batch = lambda speaker_id, texts: self._synthesize_batch(model_id, texts, speaker_id)
+        with self._batchers_lock:
+            batcher = self.batchers.get(key)
+            if batcher is None:
+                batcher = MicroBatcher(
+                    key,
+                    run_batch,
+                    max_batch_size=self.batch_size_for(model_id),
+                    window_ms=self.batch_window_ms,
+                )
+                self.batchers[key] = batcher
+            return batcher
+    
+    def _synthesize_batch(self, model_id, texts, speaker_id=None):
+        """Run one padded VITS forward pass over several texts
+        
+        Returns a (waveform, sample_rate) pair per text, with each waveform
+        trimmed to its own predicted length.
+        """
+        synthesizer = self._load_model(model_id)
+        model = synthesizer.model
+        sample_rate = model.config.sampling_rate
+        
+        if len(texts) > 1 and synthesizer.tokenizer.pad_token_id is None:
+            # Without a pad token the inputs cannot be stacked; run them one by one
+            return [self._synthesize_batch(model_id, [text], speaker_id)[0] for text in texts]
+        
+        speakers = self.available_models[model_id]["speakers"]
+        speaker = speakers[speaker_id] if speaker_id is not None and speakers else None
+        
+        with stage("tokenize", model_id, speaker):
+            inputs = synthesizer.tokenizer(texts, return_tensors="pt", padding=True)
+            inputs = {name: tensor.to(model.device) for name, tensor in inputs.items()}
+        
+        with stage("forward", model_id, speaker), torch.no_grad():
+            output = model(**inputs, speaker_id=speaker_id)
+        
+        waveforms = output.waveform.cpu().numpy()
+        lengths = output.sequence_lengths.cpu().numpy()
+        return [(waveforms[i, :lengths[i]], sample_rate) for i in range(len(texts))]
+    
+    def get_batching_stats(self):
+        """Return batch size and queue wait metrics per model"""
+        with self._batchers_lock:
+            batchers = dict(self.batchers)
+        return {model_id: batcher.get_stats() for model_id, batcher in batchers.items()}
+    
     def _generate_test_audio(self, output_path):
         """Generate simple test audio when ML libraries aren't available"""
         import struct